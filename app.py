@@ -1,9 +1,14 @@
-import time
+import os
 import random
 import datetime
 import streamlit as st
-from utils import responder_usuario, registrar_pergunta_nao_respondida
+from utils import responder_usuario_stream, registrar_pergunta_nao_respondida, estatisticas_cache, registro_nao_respondidas, metricas, estado_carregamento
 import pandas as pd
+from historico import HistoricoSessao
+from rotas import ROTA_CARREGANDO
+
+# --- Mensagens exibidas por vez (as anteriores carregam sob demanda) ---
+JANELA_MENSAGENS = 20
 
 # --- Cursos e Metadados ---
 courses = {
@@ -70,58 +75,71 @@ acesso_autorizado = senha == st.secrets["admin"]["acesso"]
 st.session_state.setdefault("welcome_shown", False)
 st.session_state.setdefault("curso", None)
 st.session_state.setdefault("curso_exibido", None)
-st.session_state.setdefault("chat_history", [])
+st.session_state.setdefault("historico", HistoricoSessao())
+st.session_state.setdefault("janela", JANELA_MENSAGENS)
+historico = st.session_state.historico
+
+
+# --- Exibe só as últimas mensagens, com botão para carregar as anteriores ---
+def exibir_historico(chave: str = "anteriores"):
+    ocultas = len(historico) - st.session_state.janela
+    if ocultas > 0 and st.button(f"⬆️ Carregar mensagens anteriores ({ocultas})", key=chave):
+        st.session_state.janela += JANELA_MENSAGENS
+    for msg in historico.recentes(st.session_state.janela):
+        quem = "user" if msg["role"] == "user" else "assistant"
+        with st.chat_message(quem):
+            st.markdown(msg["content"], unsafe_allow_html=True)
 
 # --- 1) Saudação + digitação + pergunta de curso (apenas uma vez) ---
 if not st.session_state.welcome_shown:
-    with st.spinner("JOTHA está digitando…"):
-        time.sleep(1)
-
-    st.session_state.chat_history.append({
-        "role": "assistant",
-        "content": get_welcome_message()
-    })
-    st.session_state.chat_history.append({
-        "role": "assistant",
-        "content": "Para começarmos, qual o seu curso? 🎓"
-    })
+    # modelo e índices carregam em segundo plano: a saudação não espera por eles
+    # (mensagens de interface: aparecem no chat, mas não vão para o prompt)
+    historico.adicionar("assistant", get_welcome_message(), prompt=False)
+    historico.adicionar("assistant", "Para começarmos, qual o seu curso? 🎓", prompt=False)
     st.session_state.welcome_shown = True
 
 # --- 2) Se ainda não escolheu curso: renderiza histórico + select + confirm e para ---
 if st.session_state.curso is None:
-    for msg in st.session_state.chat_history:
-        quem = "user" if msg["role"] == "user" else "assistant"
-        with st.chat_message(quem):
-            st.markdown(msg["content"], unsafe_allow_html=True)
+    exibir_historico("anteriores_inicio")
 
     escolha = st.selectbox("Selecione seu curso", list(courses.keys()))
     if st.button("Confirmar"):
         st.session_state.curso = courses[escolha]
         st.session_state.curso_exibido = escolha
-        st.session_state.chat_history.append({
-            "role": "assistant",
-            "content": f"Ótimo! Você escolheu **{escolha}**. Vamos lá! 🚀"
-        })
+        historico.adicionar("assistant", f"Ótimo! Você escolheu **{escolha}**. Vamos lá! 🚀", prompt=False)
         # segue a execução para o próximo bloco
     else:
         st.stop()
 
 # --- 3) Curso definido: receber pergunta e registrar no histórico ANTES do loop ---
 pergunta = st.chat_input("")
+resposta_stream = None
 if pergunta:
-    st.session_state.chat_history.append({"role": "user", "content": pergunta})
-    resposta, encontrado = responder_usuario(pergunta)
-    st.session_state.chat_history.append({"role": "assistant", "content": resposta})
-    if not encontrado:
+    # o prompt usa o histórico anterior a esta pergunta
+    resposta, encontrado, rota = responder_usuario_stream(pergunta)
+    # durante o carregamento a pergunta não foi respondida nem "não encontrada":
+    # o turno aparece no chat, mas fica fora do prompt e do registro da coordenação
+    carregando = rota == ROTA_CARREGANDO
+    historico.adicionar("user", pergunta, prompt=not carregando)
+    if isinstance(resposta, str):
+        # FAQ exato / fallbacks: texto pronto
+        historico.adicionar("assistant", resposta, prompt=not carregando)
+    else:
+        # resposta do Groq: renderizada trecho a trecho depois do histórico
+        resposta_stream = resposta
+    if not encontrado and not carregando:
         registrar_pergunta_nao_respondida(pergunta)
     # o próprio chat_input dispara o rerun, então não precisamos de st.experimental_rerun()
 
 
-# --- 4) Exibe todo histórico (1 único loop) ---
-for msg in st.session_state.chat_history:
-    quem = "user" if msg["role"] == "user" else "assistant"
-    with st.chat_message(quem):
-        st.markdown(msg["content"], unsafe_allow_html=True)
+# --- 4) Exibe as mensagens recentes do histórico (1 único loop) ---
+exibir_historico()
+
+# --- 4b) Resposta em streaming: exibe token a token e guarda o texto final ---
+if resposta_stream is not None:
+    with st.chat_message("assistant"):
+        texto_final = st.write_stream(resposta_stream)
+    historico.adicionar("assistant", texto_final.strip(), prompt=not carregando)
 
 # --- 5) Mudar curso + Sidebar de não-respondidas ---
 col1, col2 = st.columns([4, 1])
@@ -129,7 +147,7 @@ with col1:
     st.markdown(f"**Curso selecionado:** {st.session_state.curso_exibido}")
 with col2:
     if st.button("🔄️ Mudar curso"):
-        for k in ("welcome_shown", "curso", "curso_exibido", "chat_history"):
+        for k in ("welcome_shown", "curso", "curso_exibido", "historico", "janela"):
             st.session_state.pop(k, None)
         st.stop()
 
@@ -137,13 +155,57 @@ with col2:
 if acesso_autorizado:
     st.sidebar.markdown("---")
     st.sidebar.subheader("📥 Perguntas não respondidas")
-    try:
-        df = pd.read_csv("data/nao_respondido.csv")
-        st.sidebar.dataframe(df, use_container_width=True)
-        csv = df.to_csv(index=False).encode("utf-8")
-        st.sidebar.download_button("📁 Baixar nao_respondido.csv", csv, "nao_respondido.csv", "text/csv")
-    except FileNotFoundError:
+    total = registro_nao_respondidas.total()
+    if total == 0:
         st.sidebar.info("Nenhuma pergunta registrada.")
+    else:
+        # agregado por curso + uma página por vez (nada de carregar o log inteiro)
+        st.sidebar.dataframe(pd.DataFrame(registro_nao_respondidas.por_curso()), use_container_width=True)
+        por_pagina = 25
+        paginas = (total - 1) // por_pagina + 1
+        pagina = st.sidebar.number_input(f"Página (de {paginas})", min_value=1, max_value=paginas, value=1) - 1
+        df = pd.DataFrame(registro_nao_respondidas.pagina(pagina, por_pagina))
+        df["ultima_vez"] = pd.to_datetime(df["ultima_vez"], unit="s")
+        st.sidebar.dataframe(df[["pergunta", "curso", "vezes", "ultima_vez"]], use_container_width=True)
+        if st.sidebar.button("📁 Preparar CSV"):
+            st.sidebar.download_button(
+                "Baixar nao_respondido.csv", registro_nao_respondidas.exportar_csv(),
+                "nao_respondido.csv", "text/csv"
+            )
+
+    st.sidebar.subheader("⏱️ Latência por etapa")
+    janela = st.sidebar.selectbox("Janela", ["15 min", "1 h", "24 h", "Tudo"], index=1)
+    segundos = {"15 min": 900, "1 h": 3600, "24 h": 86400, "Tudo": None}[janela]
+    percentis = metricas.percentis(segundos)
+    if percentis:
+        st.sidebar.dataframe(pd.DataFrame(percentis).T, use_container_width=True)
+    else:
+        st.sidebar.info("Nenhuma resposta medida ainda.")
+    rotas = metricas.contadores("respostas", "rota")
+    if rotas:
+        st.sidebar.caption("Rotas das respostas")
+        st.sidebar.bar_chart(pd.Series(rotas, name="respostas"))
+    tokens = metricas.contadores("tokens_llm", "tipo")
+    if tokens:
+        st.sidebar.caption(" · ".join(f"{int(v)} tokens de {k}" for k, v in tokens.items()))
+    medidores = metricas.medidores()
+    if "llm_fila" in medidores:
+        deduplicadas = sum(metricas.contadores("llm_deduplicadas").values())
+        st.sidebar.caption(
+            f"Groq: {int(medidores['llm_fila'])} na fila · {int(medidores.get('llm_em_voo', 0))} em andamento · "
+            f"{int(deduplicadas)} perguntas iguais aproveitadas"
+        )
+    st.sidebar.download_button("📈 Métricas (Prometheus)", metricas.exportar_prometheus(), "metricas.txt", "text/plain")
+
+    st.sidebar.subheader("🧠 Carregamento")
+    for recurso, e in estado_carregamento().items():
+        tempo = f" em {e['segundos']:.1f}s" if e.get("segundos") is not None else ""
+        st.sidebar.caption(f"{os.path.basename(recurso)}: {e['estado']}{tempo}" + (f" — {e['erro']}" if e.get("erro") else ""))
+
+    st.sidebar.subheader("⚡ Cache de respostas")
+    stats = estatisticas_cache()
+    st.sidebar.metric("Taxa de acerto", f"{stats['taxa_acerto']:.0%}")
+    st.sidebar.caption(f"{stats['acertos']} acertos · {stats['falhas']} falhas · {stats['itens']} respostas guardadas")
 
 st.markdown("""
 <style>
@@ -0,0 +1,22 @@
+from indices import normalize_string
+from rotas import ROTA_FAQ, ROTA_CACHE
+
+# Critérios de acerto da recuperação, usados pelo benchmark.py e pelo responder_lote.py.
+
+
+# --- A recuperação trouxe algo do curso do usuário? (FAQ exato conta como acerto) ---
+def acertou_curso(preparo, curso: str) -> bool:
+    if preparo.rota in (ROTA_FAQ, ROTA_CACHE):
+        return True
+    alvo = normalize_string(curso)
+    return any(
+        normalize_string(d.metadata.get("curso", "")) == alvo
+        for fonte in ("faq", "planos") for d in preparo.docs.get(fonte, [])
+    )
+
+
+# --- A fonte esperada para a pergunta trouxe documentos? ---
+def acertou_fonte(preparo, esperado: str) -> bool:
+    if esperado == "faq" and preparo.rota == ROTA_FAQ:
+        return True
+    return bool(preparo.docs.get(esperado))
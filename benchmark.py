@@ -0,0 +1,156 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import resource
+import threading
+from collections import defaultdict, Counter
+from contextlib import contextmanager
+import numpy as np
+from indices import ler_metadados, MODELO_EMBEDDINGS
+from groq_falso import GroqFalso
+from rag import MotorRespostas
+from avaliacao import acertou_curso, acertou_fonte
+
+# Benchmark sem Streamlit: roda um conjunto fixo de perguntas por curso contra os
+# três índices, com um Groq falso no lugar da API, e grava latências por etapa
+# (p50/p95), taxa de acerto da recuperação por curso e pico de memória em JSON.
+# Uso: python benchmark.py [--perguntas data/benchmark_perguntas.jsonl] [--saida benchmark_resultado.json]
+
+
+# --- Memória residente máxima do processo, em MB ---
+def memoria_pico_mb() -> float:
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB; macOS em bytes
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+
+# --- Acumula a duração de cada etapa (seguro entre threads da recuperação) ---
+class Cronometro:
+    def __init__(self):
+        self.tempos = defaultdict(list)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def __call__(self, nome: str):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.tempos[nome].append((time.perf_counter() - inicio) * 1000)
+
+    def resumo(self) -> dict:
+        return {
+            nome: {
+                "n": len(ms),
+                "p50_ms": round(float(np.percentile(ms, 50)), 3),
+                "p95_ms": round(float(np.percentile(ms, 95)), 3),
+                "media_ms": round(float(np.mean(ms)), 3),
+            }
+            for nome, ms in sorted(self.tempos.items())
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark headless da recuperação e das respostas do JOTHA.")
+    parser.add_argument("--perguntas", default="data/benchmark_perguntas.jsonl")
+    parser.add_argument("--raiz", default="vectorstore", help="pasta com faq_index, legal_index e planos_index")
+    parser.add_argument("--saida", default="benchmark_resultado.json")
+    parser.add_argument("--repeticoes", type=int, default=1)
+    parser.add_argument("--latencia-llm", type=float, default=0.0, help="latência simulada do Groq (s)")
+    parser.add_argument("--cache-limiar", type=float, default=None,
+                        help="ativa o cache semântico (num SQLite temporário) com este limiar")
+    args = parser.parse_args()
+
+    with open(args.perguntas, encoding="utf-8") as f:
+        perguntas = [json.loads(linha) for linha in f if linha.strip()]
+
+    memoria_inicial = memoria_pico_mb()
+    cronometro = Cronometro()
+
+    # --- Carga: modelo + índices ---
+    inicio = time.perf_counter()
+    from langchain_huggingface import HuggingFaceEmbeddings
+    embeddings = HuggingFaceEmbeddings(model_name=MODELO_EMBEDDINGS)
+    cache = None
+    if args.cache_limiar is not None:
+        from cache_respostas import CacheRespostas
+        cache = CacheRespostas(os.path.join(tempfile.mkdtemp(), "cache.sqlite"),
+                               raiz_indices=args.raiz, limiar=args.cache_limiar)
+    cliente = GroqFalso(latencia=args.latencia_llm)
+    motor = MotorRespostas(embeddings, cliente=cliente, cache=cache, raiz=args.raiz, medir=cronometro)
+    motor.aguardar()  # índices carregam em segundo plano
+    if not motor.pronto():
+        sys.exit(f"Falha ao carregar os índices: {motor.estado_carregamento()}")
+    carga_s = time.perf_counter() - inicio
+    memoria_carregado = memoria_pico_mb()
+
+    # aquecimento: a primeira consulta paga inicializações preguiçosas do torch/FAISS
+    motor.preparar(perguntas[0]["pergunta"], perguntas[0]["curso"])
+    cronometro.tempos.clear()
+
+    # --- Execução ---
+    rotas = Counter()
+    por_curso = defaultdict(lambda: {"perguntas": 0, "acertos_curso": 0, "com_esperado": 0, "acertos_fonte": 0})
+    for _ in range(args.repeticoes):
+        for item in perguntas:
+            curso, pergunta = item["curso"], item["pergunta"]
+            with cronometro("total"):
+                emb = motor.embutir(pergunta)
+                preparo = motor.preparar(pergunta, curso, [], emb)
+                if preparo.mensagens is not None:
+                    with cronometro("llm"):
+                        rsp = motor.chamar_llm(preparo.mensagens)
+                    motor.guardar_no_cache(curso, pergunta, emb, rsp.choices[0].message.content)
+            rotas[preparo.rota] += 1
+            stats = por_curso[curso]
+            stats["perguntas"] += 1
+            stats["acertos_curso"] += acertou_curso(preparo, curso)
+            if item.get("esperado"):
+                stats["com_esperado"] += 1
+                stats["acertos_fonte"] += acertou_fonte(preparo, item["esperado"])
+
+    for stats in por_curso.values():
+        stats["taxa_acerto_curso"] = round(stats["acertos_curso"] / stats["perguntas"], 3)
+        if stats["com_esperado"]:
+            stats["taxa_acerto_fonte"] = round(stats["acertos_fonte"] / stats["com_esperado"], 3)
+
+    total = sum(rotas.values())
+    resultado = {
+        "config": {
+            "perguntas": args.perguntas,
+            "repeticoes": args.repeticoes,
+            "latencia_llm_s": args.latencia_llm,
+            "cache_limiar": args.cache_limiar,
+            "indices": {
+                nome: ler_metadados(os.path.join(args.raiz, nome))
+                for nome in ("faq_index", "legal_index", "planos_index")
+            },
+        },
+        "carga_s": round(carga_s, 3),
+        "etapas": cronometro.resumo(),
+        "rotas": {rota: {"n": n, "fracao": round(n / total, 3)} for rota, n in rotas.most_common()},
+        "por_curso": dict(sorted(por_curso.items())),
+        "cache": cache.estatisticas() if cache else None,
+        "memoria_mb": {
+            "inicial": round(memoria_inicial, 1),
+            "apos_carga": round(memoria_carregado, 1),
+            "pico": round(memoria_pico_mb(), 1),
+        },
+    }
+
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+
+    print(f"⏱️ Carga: {carga_s:.2f}s | memória pico: {resultado['memoria_mb']['pico']:.0f} MB")
+    for nome, r in resultado["etapas"].items():
+        print(f"  {nome:<18} p50 {r['p50_ms']:>9.2f} ms   p95 {r['p95_ms']:>9.2f} ms   (n={r['n']})")
+    print("🔀 Rotas: " + ", ".join(f"{r} {v['fracao']:.0%}" for r, v in resultado["rotas"].items()))
+    print(f"📝 Resultado salvo em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+
+# --- Cache semântico de respostas: (curso, vetor da pergunta) -> resposta do LLM ---
+# Persistido em SQLite; perguntas quase idênticas (cosseno >= limiar) do mesmo curso
+# reaproveitam a resposta. Expira por TTL, tem limite de itens (descarta o menos
+# usado recentemente) e é esvaziado sempre que algum índice em vectorstore/ muda.
+
+# --- Impressão digital dos índices: muda quando qualquer index.faiss é regravado ---
+def versao_indices(raiz: str = "vectorstore") -> str:
+    h = hashlib.sha1()
+    for pasta, _, arquivos in sorted(os.walk(raiz)):
+        for nome in sorted(arquivos):
+            if nome.endswith((".faiss", ".pkl", ".sqlite")):
+                info = os.stat(os.path.join(pasta, nome))
+                h.update(f"{pasta}/{nome}:{info.st_mtime_ns}:{info.st_size}".encode())
+    return h.hexdigest()
+
+
+class CacheRespostas:
+    def __init__(self, caminho: str = "data/cache_respostas.sqlite", raiz_indices: str = "vectorstore",
+                 limiar: float = 0.95, ttl_segundos: int = 7 * 24 * 3600, max_itens: int = 2000,
+                 checar_indices_a_cada: int = 30):
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        self.raiz_indices = raiz_indices
+        self.limiar = limiar
+        self.ttl = ttl_segundos
+        self.max_itens = max_itens
+        self.checar_a_cada = checar_indices_a_cada
+        self._lock = threading.Lock()
+        self._ultima_checagem = 0.0
+        self._memoria = {}  # curso -> (ids, matriz normalizada, respostas, criado_em)
+        self._db = sqlite3.connect(caminho, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS respostas (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                curso TEXT NOT NULL,
+                pergunta TEXT NOT NULL,
+                vetor BLOB NOT NULL,
+                resposta TEXT NOT NULL,
+                criado_em REAL NOT NULL,
+                usado_em REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_respostas_curso ON respostas (curso);
+            CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor TEXT NOT NULL);
+        """)
+        self._db.commit()
+        self._verificar_indices(forcar=True)
+
+    # --- Esvazia o cache se os índices foram reconstruídos desde a última gravação ---
+    def _verificar_indices(self, forcar: bool = False):
+        agora = time.time()
+        if not forcar and agora - self._ultima_checagem < self.checar_a_cada:
+            return
+        self._ultima_checagem = agora
+        versao = versao_indices(self.raiz_indices)
+        row = self._db.execute("SELECT valor FROM meta WHERE chave = 'versao_indices'").fetchone()
+        if row is None or row[0] != versao:
+            self._db.execute("DELETE FROM respostas")
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('versao_indices', ?)", (versao,))
+            self._db.commit()
+            self._memoria.clear()
+
+    def _contar(self, chave: str):
+        self._db.execute(
+            "INSERT INTO meta VALUES (?, '1') ON CONFLICT(chave) DO UPDATE SET valor = CAST(valor AS INTEGER) + 1",
+            (chave,)
+        )
+        self._db.commit()
+
+    # --- Matriz em memória dos vetores de um curso (recarregada após gravações) ---
+    # Guarda também criado_em: a cópia pode durar mais que o TTL das respostas.
+    def _matriz(self, curso: str):
+        if curso not in self._memoria:
+            limite = time.time() - self.ttl
+            rows = self._db.execute(
+                "SELECT id, vetor, resposta, criado_em FROM respostas WHERE curso = ? AND criado_em >= ?",
+                (curso, limite)
+            ).fetchall()
+            if rows:
+                ids = [r[0] for r in rows]
+                matriz = np.vstack([np.frombuffer(r[1], dtype="float32") for r in rows])
+                criado_em = np.array([r[3] for r in rows])
+                self._memoria[curso] = (ids, matriz, [r[2] for r in rows], criado_em)
+            else:
+                self._memoria[curso] = ([], None, [], None)
+        return self._memoria[curso]
+
+    # --- Procura resposta para pergunta quase idêntica do mesmo curso ---
+    def buscar(self, curso: str, emb_perg):
+        with self._lock:
+            self._verificar_indices()
+            ids, matriz, respostas, criado_em = self._matriz(curso)
+            if matriz is None:
+                self._contar("falhas")
+                return None
+            consulta = np.asarray(emb_perg, dtype="float32")
+            consulta = consulta / max(float(np.linalg.norm(consulta)), 1e-12)
+            scores = matriz @ consulta
+            # respostas que expiraram depois de a matriz ser montada não valem mais
+            scores[criado_em < time.time() - self.ttl] = -np.inf
+            melhor = int(np.argmax(scores))
+            if scores[melhor] < self.limiar:
+                self._contar("falhas")
+                return None
+            self._db.execute("UPDATE respostas SET usado_em = ? WHERE id = ?", (time.time(), ids[melhor]))
+            self._contar("acertos")
+            return respostas[melhor]
+
+    # --- Guarda uma resposta nova, respeitando o limite de itens (LRU) ---
+    def guardar(self, curso: str, pergunta: str, emb_perg, resposta: str):
+        vetor = np.asarray(emb_perg, dtype="float32")
+        vetor = vetor / max(float(np.linalg.norm(vetor)), 1e-12)
+        agora = time.time()
+        with self._lock:
+            self._db.execute("DELETE FROM respostas WHERE criado_em < ?", (agora - self.ttl,))
+            self._db.execute(
+                "INSERT INTO respostas (curso, pergunta, vetor, resposta, criado_em, usado_em) VALUES (?, ?, ?, ?, ?, ?)",
+                (curso, pergunta, vetor.tobytes(), resposta, agora, agora)
+            )
+            self._db.execute(
+                "DELETE FROM respostas WHERE id IN ("
+                "SELECT id FROM respostas ORDER BY usado_em DESC LIMIT -1 OFFSET ?)",
+                (self.max_itens,)
+            )
+            self._db.commit()
+            self._memoria.clear()
+
+    # --- Apaga tudo (ex.: após atualizar os índices manualmente) ---
+    def limpar(self):
+        with self._lock:
+            self._db.execute("DELETE FROM respostas")
+            self._db.commit()
+            self._memoria.clear()
+
+    # --- Taxa de acerto e tamanho atual ---
+    def estatisticas(self) -> dict:
+        with self._lock:
+            meta = dict(self._db.execute("SELECT chave, valor FROM meta").fetchall())
+            itens = self._db.execute("SELECT COUNT(*) FROM respostas").fetchone()[0]
+        acertos, falhas = int(meta.get("acertos", 0)), int(meta.get("falhas", 0))
+        total = acertos + falhas
+        return {
+            "itens": itens,
+            "acertos": acertos,
+            "falhas": falhas,
+            "taxa_acerto": acertos / total if total else 0.0,
+        }
@@ -0,0 +1,108 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+from langchain_core.embeddings import Embeddings
+
+# --- Carregamento em segundo plano do modelo e dos índices ---
+# Cada recurso (modelo de embeddings, um índice) é uma tarefa com nome, executada
+# uma única vez num pool de threads: as agendadas na partida carregam em paralelo,
+# as demais na primeira vez que alguém as pede. O estado de cada uma (pendente,
+# carregando, pronto, erro) e o tempo gasto ficam disponíveis para o app mostrar o
+# progresso real em vez de travar o primeiro visitante.
+
+PENDENTE, CARREGANDO, PRONTO, ERRO = "pendente", "carregando", "pronto", "erro"
+
+
+class Carregador:
+    def __init__(self, max_threads: int = 4):
+        self._executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="carregamento")
+        self._lock = threading.Lock()
+        self._tarefas = {}  # nome -> Future
+        self._funcoes = {}  # nome -> fn (para tentar de novo após erro)
+        self._estado = {}   # nome -> {"estado", "segundos", "erro"}
+
+    def _executar(self, nome: str, fn):
+        self._marcar(nome, CARREGANDO)
+        inicio = time.perf_counter()
+        try:
+            valor = fn()
+        except Exception as e:
+            logging.exception(f"Falha ao carregar '{nome}'.")
+            self._marcar(nome, ERRO, time.perf_counter() - inicio, f"{type(e).__name__}: {e}")
+            raise
+        self._marcar(nome, PRONTO, time.perf_counter() - inicio)
+        logging.info(f"'{nome}' carregado em {time.perf_counter() - inicio:.1f}s.")
+        return valor
+
+    def _marcar(self, nome: str, estado: str, segundos: float = None, erro: str = None):
+        with self._lock:
+            self._estado[nome] = {"estado": estado, "segundos": segundos, "erro": erro}
+
+    # --- Começa a carregar em segundo plano (não faz nada se já foi agendado) ---
+    def agendar(self, nome: str, fn) -> Future:
+        with self._lock:
+            if nome not in self._tarefas:
+                self._funcoes[nome] = fn
+                self._estado[nome] = {"estado": PENDENTE, "segundos": None, "erro": None}
+                self._tarefas[nome] = self._executor.submit(self._executar, nome, fn)
+            return self._tarefas[nome]
+
+    # --- Reagenda as tarefas que terminaram com erro (ex.: pasta enviada depois) ---
+    def tentar_novamente(self, *nomes):
+        with self._lock:
+            for nome in nomes or tuple(self._tarefas):
+                futuro = self._tarefas.get(nome)
+                if futuro is not None and futuro.done() and futuro.exception() is not None:
+                    self._estado[nome] = {"estado": PENDENTE, "segundos": None, "erro": None}
+                    self._tarefas[nome] = self._executor.submit(self._executar, nome, self._funcoes[nome])
+
+    # --- Valor do recurso, esperando o carregamento (e agendando-o, se preciso) ---
+    def obter(self, nome: str, fn=None, timeout: float = None):
+        with self._lock:
+            futuro = self._tarefas.get(nome)
+        if futuro is None:
+            if fn is None:
+                raise KeyError(f"Recurso não agendado: {nome}")
+            futuro = self.agendar(nome, fn)
+        return futuro.result(timeout)
+
+    def pronto(self, *nomes) -> bool:
+        with self._lock:
+            nomes = nomes or tuple(self._estado)
+            return all(self._estado.get(n, {}).get("estado") == PRONTO for n in nomes)
+
+    def falhou(self, *nomes) -> bool:
+        with self._lock:
+            nomes = nomes or tuple(self._estado)
+            return any(self._estado.get(n, {}).get("estado") == ERRO for n in nomes)
+
+    def estado(self) -> dict:
+        with self._lock:
+            return {nome: dict(e) for nome, e in self._estado.items()}
+
+    # --- Espera as tarefas indicadas (ou todas) terminarem, com sucesso ou erro ---
+    def aguardar(self, *nomes, timeout: float = None) -> bool:
+        with self._lock:
+            futuros = [self._tarefas[n] for n in (nomes or self._tarefas) if n in self._tarefas]
+        _, pendentes = wait(futuros, timeout)
+        return not pendentes
+
+
+# --- Embeddings que esperam o modelo carregado em segundo plano ---
+# Permite montar os índices FAISS (que guardam uma referência ao modelo) em paralelo
+# com o carregamento do próprio modelo.
+class EmbeddingsTardios(Embeddings):
+    def __init__(self, carregador: Carregador, nome: str = "embeddings"):
+        self.carregador = carregador
+        self.nome = nome
+
+    @property
+    def modelo(self):
+        return self.carregador.obter(self.nome)
+
+    def embed_query(self, text: str):
+        return self.modelo.embed_query(text)
+
+    def embed_documents(self, texts):
+        return self.modelo.embed_documents(texts)
@@ -0,0 +1,79 @@
+import json
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+# --- Cliente HTTP do serviço de respostas (servico.py) ---
+# Mesma interface que o app usa do motor local e das métricas: responder,
+# responder_stream, estado_carregamento, percentis, contadores, medidores, exportar_prometheus e estatisticas_cache.
+# Só usa a biblioteca padrão, então as réplicas do app não carregam modelo nem índices.
+
+
+# --- Falha do serviço depois que a resposta em streaming já começou ---
+class ErroServico(RuntimeError):
+    pass
+
+
+class ClienteServico:
+    def __init__(self, url: str, timeout: float = 60.0):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _get(self, caminho: str, **params):
+        consulta = urlencode({k: v for k, v in params.items() if v is not None})
+        with urlopen(f"{self.url}{caminho}{'?' + consulta if consulta else ''}", timeout=self.timeout) as rsp:
+            corpo = rsp.read().decode("utf-8")
+            return json.loads(corpo) if rsp.headers.get_content_type() == "application/json" else corpo
+
+    def _post(self, caminho: str, dados: dict):
+        req = Request(f"{self.url}{caminho}", data=json.dumps(dados).encode("utf-8"),
+                      headers={"Content-Type": "application/json"}, method="POST")
+        return urlopen(req, timeout=self.timeout)
+
+    def pronto(self) -> bool:
+        return bool(self._get("/saude").get("pronto"))
+
+    def estado_carregamento(self) -> dict:
+        return self._get("/saude").get("carregamento", {})
+
+    # --- (texto, encontrado, rota) ---
+    def responder(self, pergunta: str, curso: str = "", historico: list = None):
+        with self._post("/responder", {"pergunta": pergunta, "curso": curso, "historico": historico or []}) as rsp:
+            dados = json.loads(rsp.read().decode("utf-8"))
+        return dados["texto"], dados["encontrado"], dados.get("rota")
+
+    # --- (gerador de trechos, encontrado, rota), lendo o NDJSON à medida que chega ---
+    # Texto pronto (FAQ exato, cache, fallbacks) volta como str, igual ao motor local.
+    # Uma linha {"erro": ...} (falha no meio do streaming) levanta ErroServico.
+    def responder_stream(self, pergunta: str, curso: str = "", historico: list = None):
+        rsp = self._post("/responder", {"pergunta": pergunta, "curso": curso,
+                                        "historico": historico or [], "stream": True})
+        cabecalho = json.loads(rsp.readline().decode("utf-8"))
+        if "texto" in cabecalho:
+            rsp.close()
+            return cabecalho["texto"], cabecalho["encontrado"], cabecalho.get("rota")
+
+        def trechos():
+            with rsp:
+                for linha in rsp:
+                    if linha.strip():
+                        dados = json.loads(linha.decode("utf-8"))
+                        if "erro" in dados:
+                            raise ErroServico(dados["erro"])
+                        yield dados["trecho"]
+
+        return trechos(), cabecalho["encontrado"], cabecalho.get("rota")
+
+    def percentis(self, ultimos_segundos: float = None) -> dict:
+        return self._get("/percentis", segundos=ultimos_segundos)
+
+    def contadores(self, nome: str, rotulo: str = None) -> dict:
+        return self._get("/contadores", nome=nome, rotulo=rotulo)
+
+    def medidores(self) -> dict:
+        return self._get("/medidores")
+
+    def exportar_prometheus(self) -> str:
+        return self._get("/metricas")
+
+    def estatisticas_cache(self) -> dict:
+        return self._get("/cache")
@@ -0,0 +1,156 @@
+import re
+from dataclasses import dataclass
+import numpy as np
+
+# --- Montagem do contexto do prompt com orçamento de tokens ---
+# Os candidatos das três fontes chegam juntos, com o vetor (normalizado) de cada
+# chunk. O montador:
+#   1) reordena pela similaridade com a pergunta (ou por um cross-encoder local);
+#   2) descarta repetidos: texto igual, contido em outro, quase idêntico no espaço
+#      de embeddings, e corta a sobreposição deixada pelo CharacterTextSplitter;
+#   3) empacota os melhores até o orçamento, sem cortar frases no meio.
+# O histórico do chat passa pelo mesmo orçamento (mais recentes primeiro).
+
+# Sobreposição mínima (em caracteres) para considerar que dois chunks se emendam
+SOBREPOSICAO_MINIMA = 15
+SOBREPOSICAO_MAXIMA = 400
+
+
+# --- Contagem de tokens: tokenizer BPE do tiktoken (o do Llama 3 deriva do cl100k);
+#     sem ele, estimativa por caracteres (pt-BR fica perto de 3,5 caracteres/token) ---
+def _criar_contador():
+    try:
+        import tiktoken
+        codificador = tiktoken.get_encoding("cl100k_base")
+        return lambda texto: len(codificador.encode(texto, disallowed_special=()))
+    except Exception:
+        return lambda texto: int(len(texto) / 3.5) + 1
+
+
+contar_tokens = _criar_contador()
+
+
+# --- Corta o texto no fim da última frase que cabe no orçamento ---
+def cortar_em_frase(texto: str, orcamento: int, contar=contar_tokens) -> str:
+    if contar(texto) <= orcamento:
+        return texto
+    frases = re.split(r"(?<=[.!?;:])\s+|\n+", texto)
+    partes, usado = [], 0
+    for frase in frases:
+        custo = contar(frase) + 1
+        if usado + custo > orcamento:
+            break
+        partes.append(frase)
+        usado += custo
+    return " ".join(partes)
+
+
+# --- Tamanho do trecho do início de b que repete o fim de a ---
+def sobreposicao(a: str, b: str) -> int:
+    for n in range(min(len(a), len(b), SOBREPOSICAO_MAXIMA), SOBREPOSICAO_MINIMA - 1, -1):
+        if a.endswith(b[:n]):
+            return n
+    return 0
+
+
+@dataclass
+class Trecho:
+    texto: str
+    fonte: str
+    score: float = 0.0
+    vetor: np.ndarray = None
+
+
+class MontadorContexto:
+    def __init__(self, orcamento_contexto: int = 1500, orcamento_historico: int = 400,
+                 max_mensagens: int = 6, limiar_duplicado: float = 0.97, reranqueador=None,
+                 contar=None):
+        self.orcamento_contexto = orcamento_contexto
+        self.orcamento_historico = orcamento_historico
+        self.max_mensagens = max_mensagens
+        self.limiar_duplicado = limiar_duplicado
+        # reranqueador(pergunta, textos) -> scores; None = similaridade de cosseno
+        self.reranqueador = reranqueador
+        self.contar = contar or contar_tokens
+
+    # --- Ordena os candidatos do mais ao menos relevante ---
+    def reranquear(self, pergunta: str, emb_perg, trechos: list) -> list:
+        if not trechos:
+            return []
+        if self.reranqueador is not None:
+            scores = self.reranqueador(pergunta, [t.texto for t in trechos])
+        else:
+            consulta = np.asarray(emb_perg, dtype="float32")
+            consulta = consulta / max(float(np.linalg.norm(consulta)), 1e-12)
+            scores = np.vstack([t.vetor for t in trechos]) @ consulta
+        for t, s in zip(trechos, scores):
+            t.score = float(s)
+        return sorted(trechos, key=lambda t: t.score, reverse=True)
+
+    # --- Remove repetidos mantendo o de maior score (entrada já ordenada) ---
+    def deduplicar(self, trechos: list) -> list:
+        mantidos = []
+        for t in trechos:
+            texto = t.texto.strip()
+            if not texto:
+                continue
+            if any(texto in m.texto for m in mantidos):
+                continue
+            if t.vetor is not None and any(
+                m.vetor is not None and float(np.dot(m.vetor, t.vetor)) >= self.limiar_duplicado
+                for m in mantidos
+            ):
+                continue
+            # chunks vizinhos do splitter: tira a parte que já está no outro
+            for m in mantidos:
+                n = sobreposicao(m.texto, texto)
+                if n:
+                    texto = texto[n:].lstrip()
+                n = sobreposicao(texto, m.texto)
+                if n:
+                    texto = texto[:-n].rstrip()
+            if texto:
+                t.texto = texto
+                mantidos.append(t)
+        return mantidos
+
+    # --- Empacota os trechos (do melhor ao pior) enquanto couberem no orçamento ---
+    def empacotar(self, trechos: list, orcamento: int) -> list:
+        escolhidos, usado = [], 0
+        for t in trechos:
+            custo = self.contar(t.texto) + 2  # + separador
+            if usado + custo <= orcamento:
+                escolhidos.append(t.texto)
+                usado += custo
+            elif not escolhidos:
+                # nem o melhor cabe inteiro: entra cortado no fim de uma frase
+                cortado = cortar_em_frase(t.texto, orcamento, self.contar)
+                if cortado:
+                    escolhidos.append(cortado)
+                    usado += self.contar(cortado) + 2
+        return escolhidos
+
+    def montar(self, pergunta: str, emb_perg, trechos: list) -> str:
+        trechos = self.deduplicar(self.reranquear(pergunta, emb_perg, trechos))
+        return "\n\n".join(self.empacotar(trechos, self.orcamento_contexto))
+
+    # --- Últimas mensagens do histórico que cabem no orçamento, em ordem cronológica ---
+    def historico(self, historico: list) -> str:
+        linhas, usado = [], 0
+        for e in reversed((historico or [])[-self.max_mensagens:]):
+            linha = f"{e['role']}: {e['content']}"
+            custo = self.contar(linha) + 1
+            if usado + custo > self.orcamento_historico:
+                if not linhas:
+                    linhas.append(cortar_em_frase(linha, self.orcamento_historico, self.contar))
+                break
+            linhas.append(linha)
+            usado += custo
+        return "\n".join(reversed(linhas))
+
+
+# --- Cross-encoder local opcional (sentence-transformers) como reranqueador ---
+def criar_cross_encoder(modelo: str):
+    from sentence_transformers import CrossEncoder
+    cross = CrossEncoder(modelo)
+    return lambda pergunta, textos: cross.predict([(pergunta, t) for t in textos])
@@ -0,0 +1,224 @@
+import json
+import time
+import random
+import logging
+import threading
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import Future
+from types import SimpleNamespace
+from contexto import contar_tokens
+
+# --- Despachante das chamadas ao LLM ---
+# Fica na frente do cliente Groq, com a mesma interface (chat.completions.create), e:
+#   - junta chamadas idênticas em voo (mesmo modelo, mensagens e parâmetros: curso,
+#     pergunta e contexto já estão nas mensagens): só a primeira vai à API, as outras
+#     recebem a mesma resposta (ou os mesmos trechos, no streaming);
+#   - limita quantas chamadas ficam abertas ao mesmo tempo (semáforo);
+#   - respeita os limites por minuto de requisições e de tokens (baldes de tokens);
+#   - repete erros transitórios (429, 5xx, conexão) com backoff exponencial e jitter,
+#     respeitando o Retry-After quando a API manda.
+# Profundidade da fila e chamadas em voo vão para medidor(nome, valor).
+
+# Status HTTP que valem nova tentativa
+STATUS_TRANSITORIOS = (408, 409, 429, 500, 502, 503, 504)
+ERROS_TRANSITORIOS = ("APIConnectionError", "APITimeoutError", "RateLimitError", "InternalServerError")
+
+_FIM = object()
+
+
+def erro_transitorio(erro: Exception) -> bool:
+    return getattr(erro, "status_code", None) in STATUS_TRANSITORIOS or type(erro).__name__ in ERROS_TRANSITORIOS
+
+
+# --- Segundos pedidos pela API no cabeçalho Retry-After (None se não houver) ---
+def espera_pedida(erro: Exception):
+    cabecalhos = getattr(getattr(erro, "response", None), "headers", None) or {}
+    try:
+        return float(cabecalhos.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+# --- Balde de tokens: 'taxa' por segundo, acumulando até 'capacidade' ---
+class BaldeTokens:
+    def __init__(self, taxa: float, capacidade: float):
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self._disponivel = capacidade
+        self._instante = time.monotonic()
+        self._lock = threading.Lock()
+
+    # --- Bloqueia até haver n tokens e os retira ---
+    def retirar(self, n: float = 1):
+        n = min(n, self.capacidade)
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                self._disponivel = min(self.capacidade, self._disponivel + (agora - self._instante) * self.taxa)
+                self._instante = agora
+                if self._disponivel >= n:
+                    self._disponivel -= n
+                    return
+                espera = (n - self._disponivel) / self.taxa
+            time.sleep(espera)
+
+
+# --- Trechos de um streaming compartilhado: um produtor, vários leitores ---
+class _Transmissao:
+    def __init__(self):
+        self.trechos = []
+        self.erro = None
+        self.fim = False
+        self.cond = threading.Condition()
+
+    def publicar(self, trecho):
+        with self.cond:
+            self.trechos.append(trecho)
+            self.cond.notify_all()
+
+    def encerrar(self, erro=None):
+        with self.cond:
+            self.erro, self.fim = erro, True
+            self.cond.notify_all()
+
+    def ler(self):
+        i = 0
+        while True:
+            with self.cond:
+                while i >= len(self.trechos) and not self.fim:
+                    self.cond.wait()
+                if i < len(self.trechos):
+                    trecho = self.trechos[i]
+                elif self.erro is not None:
+                    raise self.erro
+                else:
+                    return
+            i += 1
+            yield trecho
+
+
+class DespachanteLLM:
+    def __init__(self, cliente, max_concorrencia: int = 4, requisicoes_por_minuto: float = 30,
+                 tokens_por_minuto: float = 30000, tentativas: int = 4, espera_base: float = 0.5,
+                 espera_maxima: float = 20.0, medir=None, contar=None, medidor=None):
+        self.cliente = cliente
+        self.tentativas = tentativas
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self.medir = medir or (lambda nome: nullcontext())
+        self.contar = contar or (lambda nome, valor=1, **rotulos: None)
+        self.medidor = medidor or (lambda nome, valor, **rotulos: None)
+        self._semaforo = threading.BoundedSemaphore(max_concorrencia)
+        self._requisicoes = BaldeTokens(requisicoes_por_minuto / 60, max(1.0, requisicoes_por_minuto / 6))
+        self._tokens = BaldeTokens(tokens_por_minuto / 60, max(1.0, tokens_por_minuto / 6))
+        self._lock = threading.Lock()
+        self._em_andamento = {}  # chave do prompt -> Future (resposta) ou _Transmissao (stream)
+        self.na_fila = 0
+        self.em_voo = 0
+        self._rng = random.Random()
+        # mesma interface do cliente Groq
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.criar))
+
+    @staticmethod
+    def chave(kwargs: dict) -> str:
+        return json.dumps(kwargs, sort_keys=True, ensure_ascii=False, default=str)
+
+    def _atualizar(self, fila: int = 0, voo: int = 0):
+        with self._lock:
+            self.na_fila += fila
+            self.em_voo += voo
+            na_fila, em_voo = self.na_fila, self.em_voo
+        self.medidor("llm_fila", na_fila)
+        self.medidor("llm_em_voo", em_voo)
+
+    # --- Uma vaga: semáforo de concorrência (a espera conta como fila) ---
+    @contextmanager
+    def _vaga(self):
+        self._atualizar(fila=1)
+        try:
+            with self.medir("llm_espera"):
+                self._semaforo.acquire()
+        finally:
+            self._atualizar(fila=-1)
+        self._atualizar(voo=1)
+        try:
+            yield
+        finally:
+            self._semaforo.release()
+            self._atualizar(voo=-1)
+
+    # --- Chama a API respeitando os baldes e repetindo erros transitórios ---
+    def _com_retentativas(self, kwargs: dict, chamar):
+        custo = sum(contar_tokens(m.get("content") or "") for m in kwargs.get("messages") or [])
+        custo += kwargs.get("max_tokens") or 0
+        for tentativa in range(self.tentativas):
+            with self.medir("llm_limite"):
+                self._requisicoes.retirar(1)
+                self._tokens.retirar(custo)
+            try:
+                resultado = chamar()
+                self.contar("llm_chamadas", resultado="ok")
+                return resultado
+            except Exception as e:
+                if not erro_transitorio(e) or tentativa == self.tentativas - 1:
+                    self.contar("llm_chamadas", resultado="erro")
+                    raise
+                espera = espera_pedida(e)
+                if espera is None:
+                    # backoff exponencial com jitter completo
+                    espera = self._rng.uniform(0, min(self.espera_maxima, self.espera_base * 2 ** tentativa))
+                self.contar("llm_retentativas")
+                logging.warning(f"LLM: {type(e).__name__}; nova tentativa em {espera:.1f}s "
+                                f"({tentativa + 1}/{self.tentativas - 1}).")
+                time.sleep(espera)
+
+    def criar(self, stream: bool = False, **kwargs):
+        chave = self.chave({**kwargs, "stream": stream})
+        with self._lock:
+            em_voo = self._em_andamento.get(chave)
+            lider = em_voo is None
+            if lider:
+                em_voo = _Transmissao() if stream else Future()
+                self._em_andamento[chave] = em_voo
+        if not lider:
+            self.contar("llm_deduplicadas")
+            return em_voo.ler() if stream else em_voo.result()
+
+        if stream:
+            threading.Thread(target=self._transmitir, args=(chave, em_voo, kwargs), daemon=True).start()
+            return em_voo.ler()
+
+        try:
+            with self._vaga():
+                resposta = self._com_retentativas(kwargs, lambda: self.cliente.chat.completions.create(**kwargs))
+            em_voo.set_result(resposta)
+            return resposta
+        except BaseException as e:
+            em_voo.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._em_andamento.pop(chave, None)
+
+    # --- Produtor do streaming: lê a API numa thread e publica para todos os leitores ---
+    def _transmitir(self, chave: str, transmissao: _Transmissao, kwargs: dict):
+        def abrir():
+            # só repete enquanto nenhum trecho saiu: pede o primeiro já dentro da tentativa
+            trechos = iter(self.cliente.chat.completions.create(stream=True, **kwargs))
+            primeiro = next(trechos, _FIM)
+            return primeiro, trechos
+
+        erro = None
+        try:
+            with self._vaga():
+                primeiro, trechos = self._com_retentativas(kwargs, abrir)
+                if primeiro is not _FIM:
+                    transmissao.publicar(primeiro)
+                    for trecho in trechos:
+                        transmissao.publicar(trecho)
+        except Exception as e:
+            erro = e
+        finally:
+            with self._lock:
+                self._em_andamento.pop(chave, None)
+            transmissao.encerrar(erro)
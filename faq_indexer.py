@@ -2,9 +2,9 @@ import os
 import re
 import logging
 from langchain_community.document_loaders import PyPDFLoader
-from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_core.documents import Document
+from indexacao import indexar, argumentos_padrao, criar_embeddings
+from tabela_faq import salvar_tabela
 
 # Configuração do logging para acompanhar as etapas
 logging.basicConfig(
@@ -12,22 +12,9 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
-# Caminho do PDF do FAQ
+# Caminho do PDF do FAQ e saída do índice
 pdf_path = "data/faq.pdf"
-logging.info(f"Carregando PDF do FAQ: {pdf_path}")
-
-# Carrega o PDF
-loader = PyPDFLoader(pdf_path)
-pages = loader.load()
-logging.info(f"Total de páginas carregadas: {len(pages)}")
-
-# Junta todas as páginas em um único texto
-conteudo_total = "\n".join([p.page_content for p in pages])
-logging.info("Conteúdo total do PDF reunido.")
-
-# Divide o conteúdo por seções numeradas (ex: "11. Curso Técnico em Alimentos")
-blocos = re.split(r"(?=\n\d{1,3}\.\s)", conteudo_total)
-logging.info(f"Número de blocos identificados: {len(blocos)}")
+SAIDA_VECTORSTORE = "vectorstore/faq_index"
 
 # Expressão regular para capturar nome de curso (caso não haja metadado explícito)
 regex_curso = re.compile(
@@ -55,31 +42,54 @@ def extrair_nome_do_curso(texto: str) -> str:
     logging.info("Nenhum curso específico detectado; atribuindo 'geral'")
     return "geral"
 
-# Converte os blocos em objetos Document com metadado de curso
-docs = []
-for idx, bloco in enumerate(blocos, start=1):
-    texto = bloco.strip()
-    if len(texto) < 50:
-        logging.debug(f"Bloco {idx} ignorado por ser muito curto.")
-        continue
-    curso_detectado = extrair_nome_do_curso(texto)
-    metadados = {"fonte": "faq", "curso": curso_detectado}
-    logging.info(f"Bloco {idx}: Metadados: {metadados}")
-    doc = Document(page_content=texto, metadata=metadados)
-    docs.append(doc)
+# Lê o PDF do FAQ e converte os blocos numerados em Documents com metadado de curso
+def carregar_faq(caminho: str):
+    logging.info(f"Carregando PDF do FAQ: {caminho}")
+
+    # Carrega o PDF
+    loader = PyPDFLoader(caminho)
+    pages = loader.load()
+    logging.info(f"Total de páginas carregadas: {len(pages)}")
+
+    # Junta todas as páginas em um único texto
+    conteudo_total = "\n".join([p.page_content for p in pages])
+    logging.info("Conteúdo total do PDF reunido.")
+
+    # Divide o conteúdo por seções numeradas (ex: "11. Curso Técnico em Alimentos")
+    blocos = re.split(r"(?=\n\d{1,3}\.\s)", conteudo_total)
+    logging.info(f"Número de blocos identificados: {len(blocos)}")
+
+    docs = []
+    for idx, bloco in enumerate(blocos, start=1):
+        texto = bloco.strip()
+        if len(texto) < 50:
+            logging.debug(f"Bloco {idx} ignorado por ser muito curto.")
+            continue
+        curso_detectado = extrair_nome_do_curso(texto)
+        metadados = {"fonte": "faq", "curso": curso_detectado}
+        logging.info(f"Bloco {idx}: Metadados: {metadados}")
+        docs.append(Document(page_content=texto, metadata=metadados))
+    return docs
 
-logging.info(f"📄 Total de blocos vetorizados: {len(docs)}")
 
-# Gera os embeddings
-logging.info("Gerando embeddings...")
-embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+if __name__ == "__main__":
+    # Tipo de índice, modo incremental, lotes e threads (comuns aos indexadores)
+    args = argumentos_padrao("Indexa o FAQ institucional.").parse_args()
 
-# Cria a base vetorial FAISS
-logging.info("Criando o índice vetorial FAISS...")
-db = FAISS.from_documents(docs, embedding=embeddings)
+    # Gera os embeddings
+    logging.info("Gerando embeddings...")
+    embeddings = criar_embeddings(args.threads)
 
-# Salva localmente a base vetorial
-os.makedirs("vectorstore/faq_index", exist_ok=True)
-db.save_local("vectorstore/faq_index")
+    # Cria e salva a base vetorial FAISS completa + um sub-índice por curso + "geral"
+    # + a tabela de respostas (pergunta, resposta limpa, curso, embedding da pergunta)
+    logging.info(f"Criando o índice vetorial FAISS ({args.tipo_indice})...")
+    docs = indexar(
+        SAIDA_VECTORSTORE, {os.path.basename(pdf_path): pdf_path}, carregar_faq, embeddings,
+        tipo=args.tipo_indice, particionar=True, incremental=args.incremental,
+        processos=args.processos, tamanho_lote=args.lote,
+        extra=lambda pasta, docs: salvar_tabela(pasta, docs, embeddings),
+    )
+    if docs is not None:
+        logging.info(f"📄 Total de blocos vetorizados: {len(docs)}")
 
-logging.info("✅ FAQ vetorizado com metadados por curso!")
\ No newline at end of file
+    logging.info("✅ FAQ vetorizado com metadados por curso!")
@@ -0,0 +1,84 @@
+import time
+import random
+import threading
+from types import SimpleNamespace
+
+# --- Cliente falso com a mesma interface do Groq (chat.completions.create) ---
+# Usado no benchmark e em testes locais: não faz rede, simula a latência da API e
+# devolve um texto fixo (ou em trechos, com stream=True). Com taxa_erro > 0, parte das
+# chamadas falha como a API sob limite (status 429), para testar o despachante.
+
+
+class ErroGroqFalso(Exception):
+    def __init__(self, status_code: int = 429):
+        super().__init__(f"Erro simulado do Groq (HTTP {status_code})")
+        self.status_code = status_code
+
+
+class GroqFalso:
+    def __init__(self, latencia: float = 0.0, tokens_por_segundo: float = 0.0,
+                 resposta: str = "Resposta simulada do JOTHA. 😊", seed: int = 0, taxa_erro: float = 0.0):
+        self.latencia = latencia
+        self.tokens_por_segundo = tokens_por_segundo
+        self.resposta = resposta
+        self.taxa_erro = taxa_erro
+        self.chamadas = 0
+        self.erros = 0
+        self.em_voo = 0
+        self.em_voo_max = 0  # maior número de chamadas abertas ao mesmo tempo
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._criar))
+
+    def _esperar(self, segundos: float):
+        if segundos > 0:
+            time.sleep(segundos)
+
+    def _entrar(self):
+        with self._lock:
+            self.chamadas += 1
+            self.em_voo += 1
+            self.em_voo_max = max(self.em_voo_max, self.em_voo)
+            falhar = self._rng.random() < self.taxa_erro
+            variacao = self._rng.uniform(0.8, 1.2)
+            if falhar:
+                self.erros += 1
+        return falhar, variacao
+
+    def _sair(self):
+        with self._lock:
+            self.em_voo -= 1
+
+    def _criar(self, model=None, messages=None, temperature=None, max_tokens=None, stream=False, **kwargs):
+        falhar, variacao = self._entrar()
+        try:
+            # latência até o primeiro token, com uma pequena variação
+            self._esperar(self.latencia * variacao)
+            if falhar:
+                raise ErroGroqFalso(429)
+        except BaseException:
+            self._sair()
+            raise
+        tokens = self.resposta.split(" ")
+        uso = SimpleNamespace(
+            prompt_tokens=sum(len(m["content"].split()) for m in messages or []),
+            completion_tokens=len(tokens),
+        )
+        uso.total_tokens = uso.prompt_tokens + uso.completion_tokens
+        if stream:
+            return self._trechos(tokens)
+        try:
+            self._esperar(len(tokens) / self.tokens_por_segundo if self.tokens_por_segundo else 0)
+        finally:
+            self._sair()
+        mensagem = SimpleNamespace(content=self.resposta)
+        return SimpleNamespace(choices=[SimpleNamespace(message=mensagem)], usage=uso)
+
+    def _trechos(self, tokens):
+        try:
+            for i, token in enumerate(tokens):
+                self._esperar(1 / self.tokens_por_segundo if self.tokens_por_segundo else 0)
+                delta = SimpleNamespace(content=token if i == 0 else " " + token)
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+        finally:
+            self._sair()
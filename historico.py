@@ -0,0 +1,45 @@
+from collections import deque
+
+# --- Histórico de uma sessão de chat, com memória limitada ---
+# Guarda só as últimas max_mensagens (a interface mostra uma janela delas e carrega
+# as anteriores sob demanda). Para o prompt, não vão as mensagens cruas: vão os
+# últimos turnos da conversa e um resumo compacto com as perguntas mais antigas do
+# usuário. Mensagens da interface (saudação, escolha de curso) ficam fora do prompt.
+
+
+class HistoricoSessao:
+    def __init__(self, max_mensagens: int = 200, turnos_recentes: int = 2, max_resumo: int = 8,
+                 max_caracteres_pergunta: int = 150):
+        self.mensagens = deque(maxlen=max_mensagens)
+        self.turnos_recentes = turnos_recentes
+        self.max_caracteres_pergunta = max_caracteres_pergunta
+        # perguntas do usuário para o resumo (as dos turnos recentes saem na hora de montar)
+        self.perguntas = deque(maxlen=max_resumo + turnos_recentes)
+
+    def __len__(self):
+        return len(self.mensagens)
+
+    # --- prompt=False para mensagens só de interface (não entram no prompt) ---
+    def adicionar(self, role: str, content: str, prompt: bool = True):
+        self.mensagens.append({"role": role, "content": content, "prompt": prompt})
+        if prompt and role == "user":
+            pergunta = " ".join(content.split())
+            if len(pergunta) > self.max_caracteres_pergunta:
+                pergunta = pergunta[:self.max_caracteres_pergunta].rsplit(" ", 1)[0] + "…"
+            self.perguntas.append(pergunta)
+
+    # --- As últimas n mensagens, para exibir ---
+    def recentes(self, n: int) -> list:
+        inicio = max(0, len(self.mensagens) - n)
+        return [self.mensagens[i] for i in range(inicio, len(self.mensagens))]
+
+    # --- Histórico para o prompt: resumo das perguntas antigas + últimos turnos ---
+    def para_prompt(self) -> list:
+        conversa = [m for m in self.mensagens if m["prompt"]]
+        recentes = conversa[-2 * self.turnos_recentes:] if self.turnos_recentes else []
+        n_recentes = sum(m["role"] == "user" for m in recentes)
+        antigas = list(self.perguntas)[:max(0, len(self.perguntas) - n_recentes)]
+        itens = []
+        if antigas:
+            itens.append({"role": "resumo", "content": "perguntas anteriores do usuário: " + " | ".join(antigas)})
+        return itens + [{"role": m["role"], "content": m["content"]} for m in recentes]
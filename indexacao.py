@@ -0,0 +1,242 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from langchain_core.documents import Document
+from indices import salvar_indice, salvar_particionado, TIPOS_INDICE, MODELO_EMBEDDINGS
+
+# --- Pipeline de indexação, compartilhado pelos três indexadores ---
+# Os PDFs alterados são lidos num pool de processos; os chunks chegam por um gerador
+# e são embutidos em lotes configuráveis enquanto os próximos arquivos são lidos.
+#
+# Indexação incremental:
+# Ao lado de cada índice fica a pasta incremental/ com:
+#   arquivos.json  -> tipo do índice e hash de conteúdo de cada arquivo de origem
+#   chunks.jsonl   -> um chunk por linha (arquivo, hash do texto, texto, metadados)
+#   vetores.npy    -> vetor bruto de cada chunk (mesma ordem do chunks.jsonl)
+# Numa nova execução, arquivos inalterados são reaproveitados sem reler o PDF, só
+# chunks com texto novo são embutidos, e arquivos removidos saem do índice. Mudar só
+# o --tipo-indice reconstrói o índice com os vetores já salvos, sem embutir de novo.
+#
+# Troca atômica: cada geração do índice é gravada numa pasta oculta ao lado
+# (.faq_index-XXXX) e o nome definitivo (faq_index) é um link simbólico trocado com
+# um único os.replace, então o caminho nunca deixa de existir nem aponta para um
+# index.faiss pela metade. A geração anterior fica até a próxima troca, para quem
+# ainda estiver carregando dela. Onde não é possível criar links (Windows sem modo
+# desenvolvedor), a pasta nova substitui a antiga diretamente, em dois os.replace.
+
+PASTA_ESTADO = "incremental"
+
+
+def hash_arquivo(caminho: str) -> str:
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def hash_texto(texto: str) -> str:
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+# --- Lê o estado salvo na última indexação: (arquivos, chunks, vetores, tipo); vazio se não houver ---
+def ler_estado(saida: str):
+    pasta = os.path.join(saida, PASTA_ESTADO)
+    try:
+        with open(os.path.join(pasta, "arquivos.json"), encoding="utf-8") as f:
+            estado = json.load(f)
+        with open(os.path.join(pasta, "chunks.jsonl"), encoding="utf-8") as f:
+            chunks = [json.loads(linha) for linha in f]
+        vetores = np.load(os.path.join(pasta, "vetores.npy"))
+    except FileNotFoundError:
+        return {}, [], None, None
+    if len(chunks) != len(vetores):
+        logging.warning("Estado incremental inconsistente; reindexando do zero.")
+        return {}, [], None, None
+    if "arquivos" not in estado:
+        # formato antigo ({nome: hash}, sem o tipo): o índice é reconstruído uma vez
+        return estado, chunks, vetores, None
+    return estado["arquivos"], chunks, vetores, estado.get("tipo")
+
+
+def escrever_estado(saida: str, arquivos: dict, chunks: list, vetores, tipo: str):
+    pasta = os.path.join(saida, PASTA_ESTADO)
+    os.makedirs(pasta, exist_ok=True)
+    with open(os.path.join(pasta, "arquivos.json"), "w", encoding="utf-8") as f:
+        json.dump({"tipo": tipo, "arquivos": arquivos}, f, ensure_ascii=False, indent=2)
+    with open(os.path.join(pasta, "chunks.jsonl"), "w", encoding="utf-8") as f:
+        for c in chunks:
+            f.write(json.dumps(c, ensure_ascii=False, default=str) + "\n")
+    np.save(os.path.join(pasta, "vetores.npy"), np.asarray(vetores, dtype="float32"))
+
+
+# --- Grava uma geração nova numa pasta oculta e aponta o link simbólico para ela ---
+# Sem suporte a links, a geração nova é renomeada para o nome definitivo.
+def escrever_atomico(saida: str, escrever):
+    saida = os.path.abspath(saida)
+    pai, nome = os.path.split(saida)
+    os.makedirs(pai, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=f".{nome}-", dir=pai)
+    try:
+        escrever(tmp)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    os.chmod(tmp, 0o755)  # mkdtemp cria com 0700
+
+    # link relativo: a pasta vectorstore/ pode ser movida ou montada em outro caminho
+    link = tmp + ".link"
+    try:
+        os.symlink(os.path.basename(tmp), link, target_is_directory=True)
+    except (OSError, NotImplementedError):
+        # sem permissão para links (Windows sem modo desenvolvedor/admin): a pasta é
+        # trocada em dois passos, com um instante em que o caminho não existe
+        link = None
+
+    anterior = None
+    if os.path.islink(saida):
+        anterior = os.path.join(pai, os.readlink(saida))
+        if link is None:
+            os.remove(saida)
+    elif os.path.isdir(saida):
+        # pasta real de uma versão anterior (ou da troca sem links): vira uma geração
+        # oculta; aqui o caminho some por um instante
+        anterior = tempfile.mkdtemp(prefix=f".{nome}-", dir=pai)
+        os.replace(saida, anterior)
+    os.replace(link if link is not None else tmp, saida)
+
+    # mantém a geração nova e a anterior; apaga as mais antigas
+    for g in os.listdir(pai):
+        velha = os.path.join(pai, g)
+        if g.startswith(f".{nome}-") and velha not in (tmp, anterior) and not os.path.islink(velha):
+            shutil.rmtree(velha, ignore_errors=True)
+
+
+# --- Argumentos comuns dos indexadores ---
+def argumentos_padrao(descricao: str) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=descricao)
+    # flat = busca exata; ivf/hnsw/sq8/pq = aproximados/compactos
+    parser.add_argument("--tipo-indice", choices=TIPOS_INDICE, default="flat")
+    parser.add_argument("--incremental", action="store_true",
+                        help="relê só os arquivos alterados e só embute chunks novos")
+    parser.add_argument("--processos", type=int, default=os.cpu_count(),
+                        help="processos para ler os PDFs em paralelo")
+    parser.add_argument("--lote", type=int, default=64, help="chunks por lote de embeddings")
+    parser.add_argument("--threads", type=int, default=None, help="threads do torch para embutir")
+    return parser
+
+
+# --- Modelo de embeddings dos indexadores (threads do torch configuráveis) ---
+def criar_embeddings(threads: int = None):
+    from langchain_huggingface import HuggingFaceEmbeddings
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+    return HuggingFaceEmbeddings(model_name=MODELO_EMBEDDINGS)
+
+
+# --- Lê os arquivos em paralelo, entregando (nome, docs) na ordem dos nomes ---
+def ler_em_paralelo(carregar, fontes: dict, nomes: list, processos: int = None):
+    if not nomes:
+        return
+    if processos == 1 or len(nomes) == 1:
+        for nome in nomes:
+            yield nome, carregar(fontes[nome])
+        return
+    with ProcessPoolExecutor(max_workers=min(processos or os.cpu_count(), len(nomes))) as pool:
+        yield from zip(nomes, pool.map(carregar, [fontes[n] for n in nomes]))
+
+
+# --- Páginas distintas de um arquivo (metadado 'page' do PyPDFLoader; 1 se não houver) ---
+def contar_paginas(docs) -> int:
+    return len({d.metadata.get("page") for d in docs if "page" in d.metadata}) or 1
+
+
+# --- Indexa as fontes {nome: caminho}; carregar(caminho) -> lista de Documents ---
+# extra(pasta, docs), se informado, grava arquivos adicionais na mesma troca atômica.
+def indexar(saida: str, fontes: dict, carregar, embeddings, tipo: str = "flat",
+            particionar: bool = False, incremental: bool = False,
+            processos: int = None, tamanho_lote: int = 64, extra=None):
+    estado = ler_estado(saida) if incremental else ({}, [], None, None)
+    arquivos_antigos, chunks_antigos, vetores_antigos, tipo_antigo = estado
+    arquivos = {nome: hash_arquivo(caminho) for nome, caminho in fontes.items()}
+
+    removidos = sorted(set(arquivos_antigos) - set(arquivos))
+    alterados = sorted(n for n in arquivos if arquivos_antigos.get(n) != arquivos[n])
+    if incremental and not removidos and not alterados:
+        if tipo_antigo == tipo:
+            logging.info(f"Nada mudou em {saida}; índice mantido.")
+            return None
+        # só o tipo mudou: reconstrói o índice com os vetores salvos
+        logging.info(f"Tipo do índice mudou ({tipo_antigo or 'desconhecido'} -> {tipo}); reconstruindo {saida}.")
+    for nome in removidos:
+        logging.info(f"🗑️ Removido: {nome}")
+
+    # vetores já conhecidos, pelo hash do texto do chunk
+    conhecidos = {c["hash"]: i for i, c in enumerate(chunks_antigos)}
+    chunks, origem = [], []  # origem: linha do vetor antigo, ou None se foi embutido agora
+
+    # arquivos inalterados: chunks e vetores reaproveitados sem reler o PDF
+    for i, c in enumerate(chunks_antigos):
+        if c["arquivo"] in arquivos and c["arquivo"] not in alterados:
+            chunks.append(c)
+            origem.append(i)
+
+    # arquivos novos/alterados: lidos no pool e embutidos em lotes à medida que chegam
+    novos, pendentes = {}, {}
+    paginas, embutidos, tempo_embed = 0, 0, 0.0
+    inicio = time.perf_counter()
+
+    def esvaziar_lote():
+        nonlocal embutidos, tempo_embed
+        t0 = time.perf_counter()
+        vetores_lote = embeddings.embed_documents(list(pendentes.values()))
+        tempo_embed += time.perf_counter() - t0
+        novos.update(zip(pendentes, np.asarray(vetores_lote, dtype="float32")))
+        embutidos += len(pendentes)
+        pendentes.clear()
+
+    for nome, docs in ler_em_paralelo(carregar, fontes, alterados, processos):
+        logging.info(f"📄 {'Novo' if nome not in arquivos_antigos else 'Alterado'}: {nome} ({len(docs)} chunks)")
+        paginas += contar_paginas(docs)
+        for d in docs:
+            h = hash_texto(d.page_content)
+            chunks.append({"arquivo": nome, "hash": h, "texto": d.page_content, "metadata": d.metadata})
+            origem.append(conhecidos.get(h))
+            # embute só textos inéditos (sem repetir textos iguais)
+            if origem[-1] is None and h not in novos:
+                pendentes.setdefault(h, d.page_content)
+                if len(pendentes) >= tamanho_lote:
+                    esvaziar_lote()
+    if pendentes:
+        esvaziar_lote()
+
+    decorrido = max(time.perf_counter() - inicio, 1e-9)
+    logging.info(
+        f"⏱️ {len(alterados)} arquivos, {paginas} páginas em {decorrido:.1f}s "
+        f"({paginas / decorrido:.1f} páginas/s); {embutidos} chunks embutidos em {tempo_embed:.1f}s "
+        f"({embutidos / max(tempo_embed, 1e-9):.1f} chunks/s); {len(chunks) - embutidos} reaproveitados."
+    )
+
+    if not chunks:
+        raise ValueError(f"Nenhum chunk para indexar em {saida}.")
+    vetores = np.vstack([vetores_antigos[o] if o is not None else novos[c["hash"]] for c, o in zip(chunks, origem)])
+    docs = [Document(page_content=c["texto"], metadata=c["metadata"]) for c in chunks]
+
+    def escrever(pasta):
+        salvar_indice(docs, vetores, pasta, tipo)
+        if particionar:
+            salvar_particionado(docs, vetores, pasta, tipo)
+        escrever_estado(pasta, arquivos, chunks, vetores, tipo)
+        if extra is not None:
+            extra(pasta, docs)
+
+    escrever_atomico(saida, escrever)
+    return docs
@@ -0,0 +1,197 @@
+import os
+import json
+import shutil
+import sqlite3
+import threading
+import unicodedata
+from collections.abc import Mapping
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+from langchain_community.docstore.base import Docstore
+from langchain_community.vectorstores import FAISS
+
+# --- Modelo de embeddings usado pelos indexadores e pelo app ---
+MODELO_EMBEDDINGS = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+# --- Tipos de índice suportados pelos indexadores ---
+# flat: busca exata (força bruta) | ivf: listas invertidas | hnsw: grafo
+# sq8: vetores quantizados em int8 | pq: product quantization (mais compacto)
+TIPOS_INDICE = ("flat", "ivf", "hnsw", "sq8", "pq")
+
+# --- Normalização de strings: remove acentos, lower, underscores ---
+def normalize_string(s: str) -> str:
+    s = s or ""
+    s = s.lower()
+    s = "".join(c for c in unicodedata.normalize("NFD", s)
+                if unicodedata.category(c) != "Mn")
+    return s.replace(" ", "_")
+
+# --- Normaliza as linhas de uma matriz de vetores (norma L2 = 1) ---
+def normalizar_linhas(vetores):
+    vetores = np.asarray(vetores, dtype="float32")
+    normas = np.linalg.norm(vetores, axis=1, keepdims=True)
+    return vetores / np.clip(normas, 1e-12, None)
+
+# --- Parâmetros de cada tipo de índice, ajustados ao número de vetores ---
+def parametros_indice(tipo: str, n: int, dim: int) -> dict:
+    if tipo not in TIPOS_INDICE:
+        raise ValueError(f"Tipo de índice desconhecido: {tipo} (use um de {', '.join(TIPOS_INDICE)})")
+    if tipo == "pq" and n < 39 * 256:
+        # PQ de 8 bits treina 256 centróides por subespaço: com menos de 39 vetores
+        # por centróide (recomendação do FAISS) o treino fica ruim, então usa int8
+        tipo = "sq8"
+    if tipo == "ivf":
+        # ~4·√n listas, mas com pelo menos 39 vetores de treino por centróide (recomendação do FAISS)
+        nlist = max(1, min(int(4 * np.sqrt(n)), n // 39))
+        return {"tipo": "ivf", "fabrica": f"IVF{nlist},Flat", "nprobe": max(1, nlist // 8)}
+    if tipo == "hnsw":
+        return {"tipo": "hnsw", "fabrica": "HNSW32", "ef_search": 64}
+    if tipo == "sq8":
+        return {"tipo": "sq8", "fabrica": "SQ8"}
+    if tipo == "pq":
+        m = max(d for d in range(1, 49) if dim % d == 0)
+        return {"tipo": "pq", "fabrica": f"PQ{m}"}
+    return {"tipo": "flat", "fabrica": "Flat"}
+
+# --- Aplica os parâmetros de busca (nprobe / efSearch) a um índice carregado ---
+def configurar_busca(index, params: dict):
+    if params.get("tipo") == "ivf":
+        faiss.extract_index_ivf(index).nprobe = params["nprobe"]
+    elif params.get("tipo") == "hnsw":
+        index.hnsw.efSearch = params["ef_search"]
+    return index
+
+# --- Cria, treina e popula o índice FAISS do tipo pedido ---
+def criar_indice_faiss(vetores, params: dict):
+    vetores = np.ascontiguousarray(vetores, dtype="float32")
+    index = faiss.index_factory(vetores.shape[1], params["fabrica"], faiss.METRIC_L2)
+    if not index.is_trained:
+        index.train(vetores)
+    index.add(vetores)
+    return configurar_busca(index, params)
+
+# --- Docstore somente leitura em SQLite: documentos buscados sob demanda, sem pickle ---
+# A conexão é aberta já no carregamento e compartilhada entre threads: ela mantém o
+# arquivo lido junto com o index.faiss, mesmo que uma reindexação troque a pasta depois.
+class DocstoreSQLite(Docstore):
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._db = sqlite3.connect(f"file:{caminho}?mode=ro", uri=True, check_same_thread=False)
+        self._lock = threading.Lock()
+
+    def search(self, search: str):
+        with self._lock:
+            row = self._db.execute("SELECT texto, metadata FROM docs WHERE linha = ?", (int(search),)).fetchone()
+        if row is None:
+            return f"ID {search} not found."
+        return Document(page_content=row[0], metadata=json.loads(row[1]))
+
+    def delete(self, ids):
+        raise NotImplementedError("DocstoreSQLite é somente leitura; reindexe para alterar.")
+
+
+# --- index_to_docstore_id sem dicionário: a linha i do índice é o documento "i" ---
+class MapaLinhas(Mapping):
+    def __init__(self, n: int):
+        self.n = n
+
+    def __getitem__(self, i):
+        if not 0 <= int(i) < self.n:
+            raise KeyError(i)
+        return str(int(i))
+
+    def __iter__(self):
+        return iter(range(self.n))
+
+    def __len__(self):
+        return self.n
+
+
+def salvar_docs_sqlite(docs, caminho: str):
+    if os.path.exists(caminho):
+        os.remove(caminho)
+    db = sqlite3.connect(caminho)
+    db.execute("CREATE TABLE docs (linha INTEGER PRIMARY KEY, texto TEXT NOT NULL, metadata TEXT NOT NULL)")
+    db.executemany(
+        "INSERT INTO docs VALUES (?, ?, ?)",
+        ((i, d.page_content, json.dumps(d.metadata, ensure_ascii=False, default=str)) for i, d in enumerate(docs))
+    )
+    db.commit()
+    db.close()
+
+
+# --- Lê o index.faiss mapeado em memória (processos no mesmo host compartilham as páginas) ---
+def ler_indice_mmap(caminho: str):
+    for flag in ("IO_FLAG_MMAP_IFC", "IO_FLAG_MMAP"):
+        if hasattr(faiss, flag):
+            try:
+                return faiss.read_index(caminho, getattr(faiss, flag) | faiss.IO_FLAG_READ_ONLY)
+            except RuntimeError:
+                continue
+    return faiss.read_index(caminho)
+
+
+# --- Salva índice FAISS + documentos (SQLite) + BM25 + metadados do tipo + vetores normalizados ---
+def salvar_indice(docs, vetores, pasta: str, tipo: str = "flat"):
+    from lexico import IndiceBM25  # lexico importa normalize_string daqui
+    os.makedirs(pasta, exist_ok=True)
+    vetores = np.asarray(vetores, dtype="float32")
+    params = parametros_indice(tipo, len(docs), vetores.shape[1])
+    faiss.write_index(criar_indice_faiss(vetores, params), os.path.join(pasta, "index.faiss"))
+    salvar_docs_sqlite(docs, os.path.join(pasta, "docs.sqlite"))
+    IndiceBM25.construir([d.page_content for d in docs]).salvar(pasta)
+    np.save(os.path.join(pasta, "vetores.npy"), normalizar_linhas(vetores))
+    with open(os.path.join(pasta, "indice.json"), "w", encoding="utf-8") as f:
+        json.dump({**params, "documentos": len(docs), "dimensao": int(vetores.shape[1])}, f, indent=2)
+    return params
+
+# --- Metadados do índice salvo; índices antigos (sem indice.json) são 'flat' ---
+def ler_metadados(pasta: str) -> dict:
+    try:
+        with open(os.path.join(pasta, "indice.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"tipo": "flat", "fabrica": "Flat"}
+
+# --- Carrega um índice salvo, detectando o tipo pelos metadados ---
+def carregar_store(pasta: str, embeddings):
+    docs = os.path.join(pasta, "docs.sqlite")
+    if os.path.exists(docs):
+        # formato novo: índice mapeado em memória + documentos em SQLite, sem pickle
+        index = configurar_busca(ler_indice_mmap(os.path.join(pasta, "index.faiss")), ler_metadados(pasta))
+        return FAISS(embeddings, index, DocstoreSQLite(docs), MapaLinhas(index.ntotal))
+    # formato antigo (index.pkl), gerado antes desta versão dos indexadores
+    store = FAISS.load_local(pasta, embeddings, allow_dangerous_deserialization=True)
+    configurar_busca(store.index, ler_metadados(pasta))
+    return store
+
+# --- Salva um sub-índice por curso normalizado (docs sem curso vão para "geral") ---
+def salvar_particionado(docs, vetores, saida: str, tipo: str = "flat"):
+    raiz = os.path.join(saida, "particoes")
+    shutil.rmtree(raiz, ignore_errors=True)
+
+    grupos = {}
+    for i, d in enumerate(docs):
+        chave = normalize_string(d.metadata.get("curso") or "geral")
+        grupos.setdefault(chave, []).append(i)
+
+    vetores = np.asarray(vetores, dtype="float32")
+    manifesto = {}
+    for chave, linhas in sorted(grupos.items()):
+        salvar_indice([docs[i] for i in linhas], vetores[linhas], os.path.join(raiz, chave), tipo)
+        manifesto[chave] = {"pasta": chave, "documentos": len(linhas)}
+
+    with open(os.path.join(raiz, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({"particoes": manifesto}, f, ensure_ascii=False, indent=2)
+    return manifesto
+
+# --- Lê o manifesto de partições: {curso_normalizado: pasta}; vazio se não houver ---
+def ler_particoes(saida: str) -> dict:
+    raiz = os.path.join(saida, "particoes")
+    try:
+        with open(os.path.join(raiz, "manifest.json"), encoding="utf-8") as f:
+            manifesto = json.load(f)["particoes"]
+    except FileNotFoundError:
+        return {}
+    return {chave: os.path.join(raiz, info["pasta"]) for chave, info in manifesto.items()}
@@ -1,32 +1,37 @@
-from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_community.document_loaders import PyPDFLoader
 from langchain.text_splitter import CharacterTextSplitter
+from indexacao import indexar, argumentos_padrao, criar_embeddings
+import logging
 import os
 
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+
 # Caminho da pasta com PDFs jurídicos
 pasta_pdfs = "data/legal/"
 
-# Lista todos os arquivos PDF da pasta
-pdfs = [f for f in os.listdir(pasta_pdfs) if f.endswith(".pdf")]
+# Quebra os documentos em pedaços menores
+splitter = CharacterTextSplitter(chunk_size=500, chunk_overlap=20)
 
-all_docs = []
 
-for pdf in pdfs:
-    caminho_pdf = os.path.join(pasta_pdfs, pdf)
+# Lê um PDF jurídico e devolve seus chunks
+def carregar_legal(caminho_pdf: str):
     loader = PyPDFLoader(caminho_pdf)
-    docs = loader.load()
-    all_docs.extend(docs)
+    return splitter.split_documents(loader.load())
 
-# Quebra os documentos em pedaços menores
-splitter = CharacterTextSplitter(chunk_size=500, chunk_overlap=20)
-chunks = splitter.split_documents(all_docs)
 
-# Gera os embeddings
-embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+if __name__ == "__main__":
+    # Tipo de índice, modo incremental, processos, lotes e threads (comuns aos indexadores)
+    args = argumentos_padrao("Indexa os PDFs jurídicos.").parse_args()
+
+    # Lista todos os arquivos PDF da pasta
+    pdfs = {f: os.path.join(pasta_pdfs, f) for f in os.listdir(pasta_pdfs) if f.endswith(".pdf")}
+
+    # Gera os embeddings
+    embeddings = criar_embeddings(args.threads)
 
-# Cria e salva o índice vetorial FAISS
-db = FAISS.from_documents(chunks, embedding=embeddings)
-db.save_local("vectorstore/legal_index")
+    # Cria e salva o índice vetorial FAISS do tipo escolhido
+    indexar("vectorstore/legal_index", pdfs, carregar_legal, embeddings,
+            tipo=args.tipo_indice, incremental=args.incremental,
+            processos=args.processos, tamanho_lote=args.lote)
 
-print("✅ Vetorização dos PDFs jurídicos concluída.")
\ No newline at end of file
+    print("✅ Vetorização dos PDFs jurídicos concluída.")
@@ -0,0 +1,146 @@
+import os
+import re
+import math
+from collections import Counter
+import numpy as np
+from indices import normalize_string
+
+# --- Índice léxico (BM25) gravado ao lado de cada índice FAISS ---
+# Os embeddings do MiniLM aproximam termos exatos ("Lei 11.788", "Resolução",
+# códigos de curso, cargas horárias); o BM25 sobre os mesmos chunks recupera esses
+# casos, e a busca híbrida funde os dois rankings por reciprocal rank fusion (RRF).
+#
+# Formato (bm25.npz): vocabulário ordenado + listas invertidas em CSR
+# (inicio[t]:inicio[t+1] -> linhas e pesos do termo t). O peso BM25 de cada par
+# (termo, linha) já vem calculado, então a consulta é só uma soma por termo.
+# A linha i é a mesma linha i do índice FAISS e do docs.sqlite.
+
+ARQUIVO_BM25 = "bm25.npz"
+K1 = 1.2
+B = 0.75
+K_RRF = 60
+
+STOPWORDS = frozenset("""
+a ao aos as o os e de da das do dos em na nas no nos um uma uns umas para pra por
+pelo pela pelos pelas com sem que qual quais quando onde como se ou mas meu minha
+meus minhas seu sua seus suas eu voce ele ela isso esse essa este esta ja nao sim
+mais muito sobre entre ate ha tem ter sao ser foi quanto quanta quantos quantas
+""".split())
+
+# Sufixos removidos pelo radicalizador (mais longos primeiro)
+SUFIXOS = (
+    "amentos", "imentos", "amento", "imento", "idades", "mente", "acoes", "icoes",
+    "idade", "arias", "arios", "coes", "acao", "icao", "aria", "ario", "cao", "ais", "oes", "s",
+)
+
+
+# --- Radical simples: tira sufixos comuns e a vogal final (hora/horas/horária -> hor) ---
+def radical(termo: str) -> str:
+    if termo.isdigit():
+        return termo
+    for sufixo in SUFIXOS:
+        if termo.endswith(sufixo) and len(termo) - len(sufixo) >= 3:
+            termo = termo[:-len(sufixo)]
+            break
+    if len(termo) > 3 and termo[-1] in "aeo":
+        termo = termo[:-1]
+    return termo
+
+
+# --- Palavras sem acento (normalize_string), com números inteiros, antes do radical ---
+def palavras(texto: str) -> list:
+    texto = normalize_string(texto)
+    texto = re.sub(r"(?<=\d)[.](?=\d{3})", "", texto)                  # 11.788 -> 11788
+    texto = re.sub(r"(?<=\d)(?=[a-z])|(?<=[a-z])(?=\d)", " ", texto)  # 300h -> 300 h
+    return re.findall(r"[a-z0-9]+", texto)
+
+
+# --- Tokens de busca: palavras sem stopwords, reduzidas ao radical ---
+def tokenizar(texto: str) -> list:
+    return [radical(t) for t in palavras(texto) if t not in STOPWORDS]
+
+
+class IndiceBM25:
+    def __init__(self, vocabulario, inicio, linhas, pesos, n: int):
+        self.vocabulario = vocabulario
+        self.inicio = inicio
+        self.linhas = linhas
+        self.pesos = pesos
+        self.n = n
+        self._ids = {t: i for i, t in enumerate(vocabulario)}
+
+    @classmethod
+    def construir(cls, textos):
+        contagens = [Counter(tokenizar(t)) for t in textos]
+        n = len(contagens)
+        tamanhos = np.array([sum(c.values()) for c in contagens], dtype="float32")
+        media = float(tamanhos.mean()) if n else 0.0
+
+        postagens = {}
+        for linha, c in enumerate(contagens):
+            for termo, tf in c.items():
+                postagens.setdefault(termo, []).append((linha, tf))
+
+        vocabulario = sorted(postagens)
+        inicio, linhas, pesos = [0], [], []
+        for termo in vocabulario:
+            lista = postagens[termo]
+            idf = math.log(1 + (n - len(lista) + 0.5) / (len(lista) + 0.5))
+            for linha, tf in lista:
+                norma = K1 * (1 - B + B * tamanhos[linha] / max(media, 1e-9))
+                linhas.append(linha)
+                pesos.append(idf * tf * (K1 + 1) / (tf + norma))
+            inicio.append(len(linhas))
+        return cls(vocabulario, np.array(inicio, dtype="int64"), np.array(linhas, dtype="int32"),
+                   np.array(pesos, dtype="float32"), n)
+
+    def salvar(self, pasta: str):
+        np.savez(os.path.join(pasta, ARQUIVO_BM25), vocabulario=np.array(self.vocabulario, dtype=str),
+                 inicio=self.inicio, linhas=self.linhas, pesos=self.pesos, n=np.array(self.n))
+
+    # --- Carrega o bm25.npz da pasta; None para índices gravados antes dele existir ---
+    @classmethod
+    def carregar(cls, pasta: str):
+        caminho = os.path.join(pasta, ARQUIVO_BM25)
+        if not os.path.exists(caminho):
+            return None
+        with np.load(caminho) as z:
+            return cls(z["vocabulario"].tolist(), z["inicio"], z["linhas"], z["pesos"], int(z["n"]))
+
+    def _termos(self, consulta: str) -> list:
+        return [self._ids[t] for t in dict.fromkeys(tokenizar(consulta)) if t in self._ids]
+
+    # --- As k linhas de maior BM25 para a consulta: [(linha, score)] ---
+    def buscar(self, consulta: str, k: int) -> list:
+        scores = np.zeros(self.n, dtype="float32")
+        for t in self._termos(consulta):
+            a, b = self.inicio[t], self.inicio[t + 1]
+            scores[self.linhas[a:b]] += self.pesos[a:b]
+        achados = np.flatnonzero(scores)
+        if len(achados) > k:
+            achados = achados[np.argpartition(-scores[achados], k - 1)[:k]]
+        achados = achados[np.argsort(-scores[achados], kind="stable")]
+        return [(int(i), float(scores[i])) for i in achados]
+
+    # --- Fração dos termos da consulta presentes na linha (0 se a consulta não tiver termos) ---
+    def cobertura(self, consulta: str, linha: int) -> float:
+        termos = list(dict.fromkeys(tokenizar(consulta)))
+        if not termos:
+            return 0.0
+        presentes = 0
+        for termo in termos:
+            t = self._ids.get(termo)
+            if t is not None:
+                lista = self.linhas[self.inicio[t]:self.inicio[t + 1]]  # linhas em ordem crescente
+                j = np.searchsorted(lista, linha)
+                presentes += bool(j < len(lista) and lista[j] == linha)
+        return presentes / len(termos)
+
+
+# --- Reciprocal rank fusion: cada ranking é uma lista de linhas, da melhor à pior ---
+def fundir_rrf(*rankings, k: int = K_RRF) -> list:
+    scores = {}
+    for ranking in rankings:
+        for posicao, linha in enumerate(ranking):
+            scores[linha] = scores.get(linha, 0.0) + 1.0 / (k + posicao + 1)
+    return sorted(scores.items(), key=lambda par: par[1], reverse=True)
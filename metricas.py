@@ -0,0 +1,114 @@
+import time
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+import numpy as np
+
+# --- Registro de métricas em processo: tempos por etapa e contadores ---
+# Cada etapa guarda uma janela móvel das últimas amostras (para percentis recentes)
+# e também soma/contagem acumuladas (para exportar como summary do Prometheus).
+# Contadores aceitam rótulos, ex.: contar("respostas", rota="rag").
+# Medidores guardam o valor atual (ex.: profundidade da fila do LLM).
+
+
+def _chave(nome: str, rotulos: dict):
+    return nome, tuple(sorted(rotulos.items()))
+
+
+def _rotulos_prometheus(rotulos) -> str:
+    if not rotulos:
+        return ""
+    partes = ",".join(f'{k}="{str(v)}"' for k, v in rotulos)
+    return "{" + partes + "}"
+
+
+class RegistroMetricas:
+    def __init__(self, janela: int = 1000, prefixo: str = "jotha"):
+        self.janela = janela
+        self.prefixo = prefixo
+        self._lock = threading.Lock()
+        self._amostras = defaultdict(lambda: deque(maxlen=self.janela))  # etapa -> (instante, ms)
+        self._soma = defaultdict(float)
+        self._contagem = defaultdict(int)
+        self._contadores = defaultdict(float)
+        self._medidores = {}
+
+    # --- Cronometra uma etapa: with metricas.medir("embed"): ... ---
+    @contextmanager
+    def medir(self, nome: str):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar_tempo(nome, (time.perf_counter() - inicio) * 1000)
+
+    def registrar_tempo(self, nome: str, ms: float):
+        with self._lock:
+            self._amostras[nome].append((time.time(), ms))
+            self._soma[nome] += ms
+            self._contagem[nome] += 1
+
+    def contar(self, nome: str, valor: float = 1, **rotulos):
+        with self._lock:
+            self._contadores[_chave(nome, rotulos)] += valor
+
+    # --- Valor atual de um medidor, ex.: medidor("llm_fila", 3) ---
+    def medidor(self, nome: str, valor: float, **rotulos):
+        with self._lock:
+            self._medidores[_chave(nome, rotulos)] = valor
+
+    def medidores(self) -> dict:
+        with self._lock:
+            return {nome: valor for (nome, rotulos), valor in sorted(self._medidores.items()) if not rotulos}
+
+    # --- Percentis das amostras recentes (opcionalmente só dos últimos N segundos) ---
+    def percentis(self, ultimos_segundos: float = None, quantis=(50, 95, 99)) -> dict:
+        limite = time.time() - ultimos_segundos if ultimos_segundos else 0
+        with self._lock:
+            janelas = {nome: [ms for t, ms in amostras if t >= limite] for nome, amostras in self._amostras.items()}
+        return {
+            nome: {"n": len(ms), **{f"p{q}_ms": round(float(np.percentile(ms, q)), 2) for q in quantis}}
+            for nome, ms in sorted(janelas.items()) if ms
+        }
+
+    # --- Totais de um contador agrupados por um rótulo, ex.: contadores("respostas", "rota") ---
+    def contadores(self, nome: str, rotulo: str = None) -> dict:
+        totais = defaultdict(float)
+        with self._lock:
+            for (n, rotulos), valor in self._contadores.items():
+                if n == nome:
+                    totais[dict(rotulos).get(rotulo, "") if rotulo else ""] += valor
+        return dict(totais)
+
+    # --- Exporta no formato texto do Prometheus ---
+    def exportar_prometheus(self) -> str:
+        linhas = []
+        with self._lock:
+            etapas = {nome: [ms for _, ms in amostras] for nome, amostras in self._amostras.items()}
+            somas, contagens = dict(self._soma), dict(self._contagem)
+            contadores = dict(self._contadores)
+            medidores = dict(self._medidores)
+
+        nome_summary = f"{self.prefixo}_etapa_ms"
+        linhas.append(f"# TYPE {nome_summary} summary")
+        for etapa, ms in sorted(etapas.items()):
+            for q in (0.5, 0.95, 0.99):
+                linhas.append(f'{nome_summary}{{etapa="{etapa}",quantile="{q}"}} {np.percentile(ms, q * 100):.3f}')
+            linhas.append(f'{nome_summary}_sum{{etapa="{etapa}"}} {somas[etapa]:.3f}')
+            linhas.append(f'{nome_summary}_count{{etapa="{etapa}"}} {contagens[etapa]}')
+
+        vistos = set()
+        for (nome, rotulos), valor in sorted(contadores.items()):
+            metrica = f"{self.prefixo}_{nome}_total"
+            if metrica not in vistos:
+                linhas.append(f"# TYPE {metrica} counter")
+                vistos.add(metrica)
+            linhas.append(f"{metrica}{_rotulos_prometheus(rotulos)} {valor:g}")
+
+        for (nome, rotulos), valor in sorted(medidores.items()):
+            metrica = f"{self.prefixo}_{nome}"
+            if metrica not in vistos:
+                linhas.append(f"# TYPE {metrica} gauge")
+                vistos.add(metrica)
+            linhas.append(f"{metrica}{_rotulos_prometheus(rotulos)} {valor:g}")
+        return "\n".join(linhas) + "\n"
@@ -1,10 +1,11 @@
 import os
 import re
+import logging
 from langchain_community.document_loaders import PyPDFLoader
 from langchain.text_splitter import CharacterTextSplitter
-from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain.schema import Document
+from indexacao import indexar, argumentos_padrao, criar_embeddings
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
 
 # Diretório com os PPCs
 DIRETORIO_PLANOS = "data/planos"
@@ -50,18 +51,9 @@ def extrair_nome_do_curso(texto: str) -> str:
 
     return "desconhecido"
 
-# Inicializa embeddings
-embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
-
-# Coleta documentos vetorizados
-todos_chunks = []
-
-for nome_arquivo in os.listdir(DIRETORIO_PLANOS):
-    caminho = os.path.join(DIRETORIO_PLANOS, nome_arquivo)
-    if not nome_arquivo.endswith(".pdf"):
-        continue
-
-    print(f"📄 Lendo {nome_arquivo}...")
+# Lê um PPC, detecta o curso e quebra em chunks com o metadado do curso
+def carregar_plano(caminho: str):
+    print(f"📄 Lendo {os.path.basename(caminho)}...")
 
     loader = PyPDFLoader(caminho)
     docs = loader.load()
@@ -76,11 +68,28 @@ for nome_arquivo in os.listdir(DIRETORIO_PLANOS):
         doc.metadata["curso"] = nome_curso
 
     splitter = CharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-    chunks = splitter.split_documents(docs)
-    todos_chunks.extend(chunks)
-
-# Cria a base vetorial
-print("⚙️ Gerando base vetorial dos planos...")
-db = FAISS.from_documents(todos_chunks, embedding=embeddings)
-db.save_local(SAIDA_VECTORSTORE)
-print("✅ Vetorização dos Planos de Curso concluída com metadados automáticos!")
\ No newline at end of file
+    return splitter.split_documents(docs)
+
+
+if __name__ == "__main__":
+    # Tipo de índice, modo incremental, processos, lotes e threads (comuns aos indexadores)
+    args = argumentos_padrao("Indexa os PPCs.").parse_args()
+
+    # Inicializa embeddings
+    embeddings = criar_embeddings(args.threads)
+
+    fontes = {
+        nome_arquivo: os.path.join(DIRETORIO_PLANOS, nome_arquivo)
+        for nome_arquivo in os.listdir(DIRETORIO_PLANOS)
+        if nome_arquivo.endswith(".pdf")
+    }
+
+    # Cria a base vetorial + sub-índices por curso (o app consulta só o curso do usuário + "geral")
+    # Os PPCs são lidos em paralelo e embutidos em lotes à medida que chegam
+    print(f"⚙️ Gerando base vetorial dos planos ({args.tipo_indice})...")
+    indexar(
+        SAIDA_VECTORSTORE, fontes, carregar_plano, embeddings,
+        tipo=args.tipo_indice, particionar=True, incremental=args.incremental,
+        processos=args.processos, tamanho_lote=args.lote,
+    )
+    print("✅ Vetorização dos Planos de Curso concluída com metadados automáticos!")
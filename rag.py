@@ -0,0 +1,532 @@
+import os
+import threading
+from collections import defaultdict
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+import numpy as np
+from indices import normalize_string, normalizar_linhas, ler_particoes, carregar_store
+from carregamento import Carregador, EmbeddingsTardios
+from recuperacao import recuperar_concorrente
+from contexto import MontadorContexto, Trecho
+from lexico import IndiceBM25, fundir_rrf, tokenizar
+from tabela_faq import TabelaFAQ, limpar_bloco_faq
+from rotas import ROTA_FAQ, ROTA_CACHE, ROTA_RAG, ROTA_NAO_ENCONTRADO, ROTA_CARREGANDO
+
+# --- Núcleo do JOTHA: busca no FAQ, RAG e montagem do prompt ---
+# Não depende do Streamlit: curso e histórico chegam como argumentos, e o cliente
+# do LLM, o cache e o medidor de etapas são injetados. O app (utils.py), o
+# benchmark e scripts usam o mesmo motor. As buscas (métodos *_lote) recebem várias
+# perguntas de uma vez: uma pergunta do chat é um lote de uma, e o responder_lote.py
+# passa o lote inteiro, com as mesmas regras.
+
+MODELO_LLM = "llama3-8b-8192"
+
+# Busca exata no FAQ: cosseno mínimo, ou cosseno menor quando o bloco contém
+# todos os termos da pergunta (ex.: "horas" + "estágio", "Lei 11.788")
+LIMIAR_FAQ = 0.85
+LIMIAR_FAQ_LEXICO = 0.5
+
+
+MSG_CARREGANDO = (
+    "⚠️ Meus índices ainda estão carregando. "
+    "Envie as pastas `faq_index`, `legal_index` e `planos_index` e clique em 'Rerun'."
+)
+MSG_AQUECENDO = (
+    "⏳ Ainda estou carregando meus arquivos ({prontos} de {total} prontos). "
+    "Tente de novo em alguns segundos! 😊"
+)
+MSG_NAO_ENCONTRADO = (
+    "🤔 Não encontrei nada nos meus arquivos. "
+    "Anotei sua dúvida e vou repassar para a coordenação!"
+)
+
+
+# --- Resultado da preparação: texto pronto (sem LLM) ou mensagens para o LLM ---
+@dataclass
+class Preparo:
+    rota: str
+    encontrado: bool
+    texto: str = None
+    mensagens: list = None
+    docs: dict = field(default_factory=dict)
+    emb_perg: object = None  # vetor da pergunta (None quando a tabela do FAQ resolveu sem embedding)
+
+
+# --- Filtra documentos por curso (mantém 'geral'); doc(item) extrai o documento do item ---
+def filtrar_por_curso(docs, curso_usuario: str, doc=lambda d: d):
+    norm_u = normalize_string(curso_usuario)
+    return [
+        d for d in docs
+        if normalize_string(doc(d).metadata.get("curso", "")) in (norm_u, "geral")
+    ]
+
+
+class MotorRespostas:
+    # embeddings: modelo pronto, ou função sem argumentos que o carrega (em segundo plano)
+    def __init__(self, embeddings, cliente=None, cache=None, raiz: str = "vectorstore",
+                 timeout_recuperacao: float = 5.0, medir=None, contar=None, montador=None):
+        self.cliente = cliente
+        self.cache = cache
+        self.raiz = raiz
+        self.timeout_recuperacao = timeout_recuperacao
+        # dedupe, rerank e orçamento de tokens do contexto e do histórico
+        self.montador = montador or MontadorContexto()
+        # medir(nome) -> context manager que cronometra uma etapa (padrão: não mede)
+        self.medir = medir or (lambda nome: nullcontext())
+        # contar(nome, valor=1, **rotulos) -> contadores (rotas, tokens, cache); padrão: não conta
+        self.contar = contar or (lambda nome, valor=1, **rotulos: None)
+        self._lock = threading.Lock()
+        self._vetores = {}
+        self._lexicos = {}
+
+        self.pasta_faq = os.path.join(raiz, "faq_index")
+        self.pasta_legal = os.path.join(raiz, "legal_index")
+        self.pasta_planos = os.path.join(raiz, "planos_index")
+        # sub-índices por curso ({curso_normalizado: pasta}); vazio = só o índice completo
+        self.particoes_faq = ler_particoes(self.pasta_faq)
+        self.particoes_planos = ler_particoes(self.pasta_planos)
+        # tabela de respostas do FAQ (None para índices gerados antes dela); é pequena e
+        # já responde perguntas idênticas enquanto o resto carrega
+        self.tabela_faq = TabelaFAQ.carregar(self.pasta_faq)
+
+        # modelo e os três índices carregam em paralelo, em segundo plano; as partições
+        # entram na fila depois deles (ou carregam no primeiro uso)
+        self.carregador = Carregador()
+        self.essenciais = ("embeddings", self.pasta_faq, self.pasta_legal, self.pasta_planos)
+        if callable(embeddings) and not hasattr(embeddings, "embed_query"):
+            self.carregador.agendar("embeddings", lambda: self._aquecer_modelo(embeddings()))
+        else:
+            self.carregador.agendar("embeddings", lambda: embeddings)
+        self.embeddings = EmbeddingsTardios(self.carregador)
+        for pasta in self.essenciais[1:] + tuple(self.particoes_faq.values()) + tuple(self.particoes_planos.values()):
+            self.carregador.agendar(pasta, lambda pasta=pasta: self._carregar_indice(pasta))
+
+    # --- Primeira consulta paga as inicializações preguiçosas do torch ---
+    @staticmethod
+    def _aquecer_modelo(modelo):
+        modelo.embed_query("aquecimento")
+        return modelo
+
+    # --- Índice + vetores + BM25 de uma pasta, já tocados para a primeira busca ser rápida ---
+    def _carregar_indice(self, pasta: str):
+        store = carregar_store(pasta, self.embeddings)
+        self.vetores_normalizados(pasta, store)
+        self.lexico(pasta)
+        return store
+
+    # --- Índices carregados uma vez por motor (o tipo vem do indice.json); espera se ainda carregando ---
+    def store(self, pasta: str):
+        return self.carregador.obter(pasta, lambda: self._carregar_indice(pasta))
+
+    @property
+    def store_faq(self):
+        return self.store(self.pasta_faq)
+
+    @property
+    def store_legal(self):
+        return self.store(self.pasta_legal)
+
+    @property
+    def store_planos(self):
+        return self.store(self.pasta_planos)
+
+    # --- Vetores normalizados de um índice (linha i = vetor i do índice FAISS) ---
+    def vetores_normalizados(self, pasta: str, store):
+        with self._lock:
+            if pasta not in self._vetores:
+                arquivo = os.path.join(pasta, "vetores.npy")
+                # mmap: os processos do mesmo host compartilham as páginas da matriz
+                vetores = np.load(arquivo, mmap_mode="r") if os.path.exists(arquivo) else None
+                if vetores is None or vetores.shape[0] != store.index.ntotal:
+                    # sem matriz salva (ou desatualizada): reconstrói a partir do próprio índice
+                    vetores = normalizar_linhas(store.index.reconstruct_n(0, store.index.ntotal))
+                self._vetores[pasta] = vetores
+            return self._vetores[pasta]
+
+    # --- Índice BM25 de um índice (None se foi gravado antes do BM25 existir) ---
+    def lexico(self, pasta: str):
+        with self._lock:
+            if pasta not in self._lexicos:
+                self._lexicos[pasta] = IndiceBM25.carregar(pasta)
+            return self._lexicos[pasta]
+
+    # --- Modelo e os três índices carregados? ---
+    def pronto(self) -> bool:
+        return self.carregador.pronto(*self.essenciais)
+
+    # --- Estado de cada recurso: {nome: {"estado", "segundos", "erro"}} ---
+    def estado_carregamento(self) -> dict:
+        return self.carregador.estado()
+
+    # --- Espera o modelo e os índices essenciais (benchmark, scripts) ---
+    def aguardar(self, timeout: float = None) -> bool:
+        return self.carregador.aguardar(*self.essenciais, timeout=timeout)
+
+    def _msg_carregando(self) -> str:
+        if self.carregador.falhou(*self.essenciais):
+            return MSG_CARREGANDO
+        estado = self.carregador.estado()
+        prontos = sum(estado.get(n, {}).get("estado") == "pronto" for n in self.essenciais)
+        return MSG_AQUECENDO.format(prontos=prontos, total=len(self.essenciais))
+
+    # --- Embute a pergunta uma única vez por turno ---
+    def embutir(self, pergunta: str):
+        with self.medir("embed"):
+            return self.embeddings.embed_query(pergunta)
+
+    @staticmethod
+    def doc_da_linha(store, linha: int):
+        return store.docstore.search(store.index_to_docstore_id[linha])
+
+    # --- Lê documentos de um índice pela linha, cada linha uma vez (perguntas de um lote repetem trechos) ---
+    def leitor_docs(self, store):
+        lidos = {}
+
+        def doc(linha: int):
+            if linha not in lidos:
+                lidos[linha] = self.doc_da_linha(store, linha)
+            return lidos[linha]
+        return doc
+
+    # --- Busca híbrida: FAISS + BM25 fundidos por RRF -> por pergunta, [(linha, doc, score)] ---
+    # Uma única busca FAISS com a matriz de perguntas. Sem pergunta ou sem bm25.npz,
+    # é só a busca vetorial (mesma ordem do FAISS).
+    def buscar_hibrido_lote(self, pasta: str, store, embs, perguntas: list, k: int) -> list:
+        bm25 = self.lexico(pasta)
+        profundidade = max(2 * k, 10) if bm25 else k
+        consultas = np.ascontiguousarray(embs, dtype="float32").reshape(len(perguntas), -1)
+        _, idxs = store.index.search(consultas, profundidade)
+        doc = self.leitor_docs(store)
+        resultado = []
+        for linhas, pergunta in zip(idxs, perguntas):
+            rankings = [[int(i) for i in linhas if i != -1]]
+            if bm25 and pergunta:
+                rankings.append([i for i, _ in bm25.buscar(pergunta, profundidade)])
+            resultado.append([(i, doc(i), s) for i, s in fundir_rrf(*rankings)[:k]])
+        return resultado
+
+    # --- Busca devolvendo (doc, vetor normalizado), para o rerank e o dedupe do contexto ---
+    def buscar_com_vetores_lote(self, pasta: str, store, embs, perguntas: list, k: int) -> list:
+        vetores = self.vetores_normalizados(pasta, store)
+        return [[(d, vetores[i]) for i, d, _ in achados]
+                for achados in self.buscar_hibrido_lote(pasta, store, embs, perguntas, k)]
+
+    def buscar_com_vetores(self, pasta: str, store, emb_perg, k: int, pergunta: str = ""):
+        return self.buscar_com_vetores_lote(pasta, store, [emb_perg], [pergunta], k)[0]
+
+    # --- Candidatos do FAQ para a busca exata: curso do usuário primeiro, senão 'geral' ---
+    # cursos já normalizados. Devolve, por pergunta, (pasta do índice consultado,
+    # [(linha, doc)] na ordem da busca híbrida); (None, []) quando não há candidatos.
+    def candidatos_faq_lote(self, embs, cursos: list, perguntas: list) -> list:
+        embs = np.asarray(embs, dtype="float32").reshape(len(perguntas), -1)
+        resultado = [(None, [])] * len(perguntas)
+        if self.particoes_faq:
+            # índice particionado: o filtro por curso acontece antes da busca; cada partição
+            # recebe uma busca com as perguntas que ainda estão sem candidatos
+            restantes = list(range(len(perguntas)))
+            for rodada in ("curso", "geral"):
+                grupos, proximos = defaultdict(list), []
+                for j in restantes:
+                    chave = cursos[j] if rodada == "curso" else "geral"
+                    (grupos[chave] if chave in self.particoes_faq else proximos).append(j)
+                for chave, grupo in grupos.items():
+                    pasta = self.particoes_faq[chave]
+                    achados = self.buscar_hibrido_lote(pasta, self.store(pasta), embs[grupo],
+                                                       [perguntas[j] for j in grupo], 20)
+                    for j, linhas in zip(grupo, achados):
+                        if linhas:
+                            resultado[j] = (pasta, [(i, d) for i, d, _ in linhas])
+                        else:
+                            proximos.append(j)
+                restantes = proximos
+            return resultado
+
+        # busca ampla no índice completo e separa específicos x geral
+        achados = self.buscar_hibrido_lote(self.pasta_faq, self.store_faq, embs, perguntas, 20)
+        for j, linhas in enumerate(achados):
+            docs = [(i, d) for i, d, _ in linhas]
+            esp = [(i, d) for i, d in docs if normalize_string(d.metadata.get("curso")) == cursos[j]]
+            candidatos = esp if esp else [(i, d) for i, d in docs if normalize_string(d.metadata.get("curso")) == "geral"]
+            if candidatos:
+                resultado[j] = (self.pasta_faq, candidatos)
+        return resultado
+
+    # --- Busca exata no FAQ, filtrando primeiro por curso: por pergunta, o doc ou None ---
+    # Os limiares valem de uma vez para a matriz (perguntas x candidatos) de cossenos.
+    def buscar_faq_exata_lote(self, perguntas: list, cursos: list, embs) -> list:
+        embs = np.asarray(embs, dtype="float32").reshape(len(perguntas), -1)
+        consultas = normalizar_linhas(embs)
+        achados = [None] * len(perguntas)
+        # perguntas da tabela do FAQ: um produto de matrizes por curso, sem FAISS
+        if self.tabela_faq is not None:
+            for j, i in enumerate(self.tabela_faq.buscar_similar_lote(consultas, cursos, LIMIAR_FAQ)):
+                if i is not None:
+                    achados[j] = self.tabela_faq.documento(i)
+        restantes = [j for j, d in enumerate(achados) if d is None]
+        if not restantes:
+            return achados
+
+        candidatos = self.candidatos_faq_lote(
+            embs[restantes], [normalize_string(cursos[j]) for j in restantes], [perguntas[j] for j in restantes]
+        )
+        por_pasta = defaultdict(list)
+        for j, (pasta, docs) in zip(restantes, candidatos):
+            if pasta is not None:
+                por_pasta[pasta].append((j, docs))
+        for pasta, grupo in por_pasta.items():
+            vetores = np.asarray(self.vetores_normalizados(pasta, self.store(pasta)))
+            bm25 = self.lexico(pasta)
+            # similaridade de cosseno contra todos os candidatos numa única operação,
+            # com -inf onde a pergunta tem menos candidatos que a mais longa do grupo
+            largura = max(len(docs) for _, docs in grupo)
+            linhas = np.zeros((len(grupo), largura), dtype="int64")
+            validos = np.zeros((len(grupo), largura), dtype=bool)
+            for r, (_, docs) in enumerate(grupo):
+                linhas[r, :len(docs)] = [i for i, _ in docs]
+                validos[r, :len(docs)] = True
+            scores = np.einsum("pkd,pd->pk", vetores[linhas], consultas[[j for j, _ in grupo]])
+            scores[~validos] = -np.inf
+            melhores = scores.argmax(axis=1)
+            for r, (j, docs) in enumerate(grupo):
+                if scores[r, melhores[r]] > LIMIAR_FAQ:
+                    achados[j] = docs[melhores[r]][1]
+                    continue
+                # termos exatos: o primeiro da busca híbrida contém todos os termos da pergunta
+                linha, doc = docs[0]
+                pergunta = perguntas[j]
+                if (bm25 is not None and scores[r, 0] > LIMIAR_FAQ_LEXICO
+                        and len(set(tokenizar(pergunta))) >= 2 and bm25.cobertura(pergunta, linha) == 1.0):
+                    achados[j] = doc
+        return achados
+
+    def buscar_faq_exata(self, pergunta: str, curso: str, emb_perg=None):
+        # reaproveita o vetor da pergunta (se já calculado no turno)
+        if emb_perg is None:
+            emb_perg = self.embutir(pergunta)
+        with self.medir("faq_exata"):
+            return self.buscar_faq_exata_lote([pergunta], [curso], [emb_perg])[0]
+
+    # --- Texto de exibição de um bloco do FAQ (já limpo na tabela, quando houver) ---
+    def resposta_faq(self, doc) -> str:
+        if doc.metadata.get("limpo"):
+            return doc.page_content
+        if self.tabela_faq is not None:
+            resposta = self.tabela_faq.resposta_do_bloco(doc.page_content)
+            if resposta is not None:
+                return resposta
+        return limpar_bloco_faq(doc.page_content)
+
+    # --- Busca restrita ao curso do usuário + 'geral': por pergunta, [(doc, vetor)] ---
+    def buscar_por_curso_lote(self, pasta: str, store, particoes: dict, embs, cursos: list,
+                              perguntas: list, k: int = 4) -> list:
+        if not particoes:
+            # índice sem partições: busca no completo e filtra depois
+            achados = self.buscar_com_vetores_lote(pasta, store, embs, perguntas, k)
+            return [filtrar_por_curso(a, curso, doc=lambda par: par[0]) for a, curso in zip(achados, cursos)]
+
+        embs = np.asarray(embs, dtype="float32").reshape(len(perguntas), -1)
+        consultas = normalizar_linhas(embs)
+        cursos = [normalize_string(c) for c in cursos]
+        achados = [[] for _ in perguntas]
+        # 'geral' recebe todas as perguntas; cada curso, só as dele
+        for chave in sorted(set(cursos) | {"geral"}):
+            if chave not in particoes:
+                continue
+            grupo = [j for j, c in enumerate(cursos) if chave in (c, "geral")]
+            sub = particoes[chave]
+            store_sub = self.store(sub)
+            vetores = self.vetores_normalizados(sub, store_sub)
+            buscas = self.buscar_hibrido_lote(sub, store_sub, embs[grupo], [perguntas[j] for j in grupo], k)
+            for j, linhas in zip(grupo, buscas):
+                for i, d, s in linhas:
+                    achados[j].append((s, float(vetores[i] @ consultas[j]), d, vetores[i]))
+        # score RRF (posição em cada ranking); empate pelo cosseno, comparável entre partições
+        return [[(d, v) for _, _, d, v in sorted(a, key=lambda x: (x[0], x[1]), reverse=True)[:k]]
+                for a in achados]
+
+    def buscar_por_curso(self, pasta: str, store, particoes: dict, emb_perg, curso_usuario: str,
+                         k: int = 4, pergunta: str = ""):
+        return self.buscar_por_curso_lote(pasta, store, particoes, [emb_perg], [curso_usuario], [pergunta], k)[0]
+
+    # --- Consulta FAQ, legislação e PPCs ao mesmo tempo (timeout por fonte) ---
+    def recuperar_fontes(self, emb_perg, curso: str, pergunta: str = "") -> dict:
+        def medido(nome, fn):
+            def executar():
+                with self.medir(f"recuperar_{nome}"):
+                    return fn()
+            return executar
+
+        return recuperar_concorrente({
+            "faq":    medido("faq", lambda: self.buscar_por_curso(
+                self.pasta_faq, self.store_faq, self.particoes_faq, emb_perg, curso, pergunta=pergunta)),
+            "legal":  medido("legal", lambda: self.buscar_com_vetores(
+                self.pasta_legal, self.store_legal, emb_perg, 4, pergunta)),
+            "planos": medido("planos", lambda: self.buscar_por_curso(
+                self.pasta_planos, self.store_planos, self.particoes_planos, emb_perg, curso, pergunta=pergunta)),
+        }, timeout=self.timeout_recuperacao)
+
+    # --- As três fontes para várias perguntas: uma busca por índice (ou partição) ---
+    def recuperar_fontes_lote(self, embs, cursos: list, perguntas: list) -> list:
+        faq = self.buscar_por_curso_lote(self.pasta_faq, self.store_faq, self.particoes_faq,
+                                         embs, cursos, perguntas)
+        legal = self.buscar_com_vetores_lote(self.pasta_legal, self.store_legal, embs, perguntas, 4)
+        planos = self.buscar_por_curso_lote(self.pasta_planos, self.store_planos, self.particoes_planos,
+                                            embs, cursos, perguntas)
+        return [{"faq": f, "legal": l, "planos": p} for f, l, p in zip(faq, legal, planos)]
+
+    # --- Preparo da rota FAQ (tabela ou busca exata) ---
+    def preparo_faq(self, doc, emb_perg=None) -> Preparo:
+        resp = f"🤗 Claro! {self.resposta_faq(doc)} 😊"
+        return Preparo(ROTA_FAQ, True, texto=resp, docs={"faq": [doc]}, emb_perg=emb_perg)
+
+    # --- Preparo a partir das três fontes ({fonte: [(doc, vetor)]}): RAG, ou não encontrado ---
+    def preparo_fontes(self, pergunta: str, curso: str, historico: list, pares: dict, emb_perg) -> Preparo:
+        docs = {fonte: [d for d, _ in achados] for fonte, achados in pares.items()}
+        if not any(docs.values()):
+            return Preparo(ROTA_NAO_ENCONTRADO, False, texto=MSG_NAO_ENCONTRADO, docs=docs, emb_perg=emb_perg)
+        mensagens = self.mensagens_rag(pergunta, curso, historico, pares, emb_perg)
+        return Preparo(ROTA_RAG, True, mensagens=mensagens, docs=docs, emb_perg=emb_perg)
+
+    # --- Prepara a resposta: texto pronto (FAQ exato, cache, fallbacks) ou mensagens para o LLM ---
+    def preparar(self, pergunta: str, curso: str = "", historico: list = None, emb_perg=None) -> Preparo:
+        raw_curso = curso or ""
+
+        # 0) Pergunta do FAQ escrita igual (ou com os mesmos termos): dicionário, sem embedding
+        if self.tabela_faq is not None:
+            with self.medir("faq_tabela"):
+                i = self.tabela_faq.buscar_chave(pergunta, raw_curso)
+            if i is not None:
+                return self.preparo_faq(self.tabela_faq.documento(i), emb_perg)
+
+        # o resto precisa do modelo e dos índices
+        if not self.pronto():
+            if self.carregador.falhou(*self.essenciais):
+                # as pastas podem ter sido enviadas depois da falha: tenta de novo
+                self.carregador.tentar_novamente(*self.essenciais)
+                self.aguardar(timeout=self.timeout_recuperacao)
+            if not self.pronto():
+                return Preparo(ROTA_CARREGANDO, False, texto=self._msg_carregando())
+
+        # Vetor da pergunta, reaproveitado em todas as buscas do turno
+        if emb_perg is None:
+            emb_perg = self.embutir(pergunta)
+
+        # 1) Tenta resposta exata via FAQ
+        doc_exato = self.buscar_faq_exata(pergunta, raw_curso, emb_perg)
+        if doc_exato:
+            return self.preparo_faq(doc_exato, emb_perg)
+
+        # 1b) Pergunta quase idêntica já respondida para este curso
+        if self.cache is not None:
+            em_cache = self.cache.buscar(normalize_string(raw_curso), emb_perg)
+            self.contar("cache_consultas", resultado="acerto" if em_cache else "falha")
+            if em_cache:
+                return Preparo(ROTA_CACHE, True, texto=em_cache, emb_perg=emb_perg)
+
+        # 2) Resto do RAG: as três fontes em paralelo (vetorial + BM25), já restritas ao curso
+        pares = self.recuperar_fontes(emb_perg, raw_curso, pergunta)
+        return self.preparo_fontes(pergunta, raw_curso, historico, pares, emb_perg)
+
+    # --- Mensagens para o LLM a partir do que as três fontes trouxeram ({fonte: [(doc, vetor)]}) ---
+    def mensagens_rag(self, pergunta: str, curso: str, historico: list, pares: dict, emb_perg) -> list:
+        curso_title = curso.replace("_", " ").title() if curso else ""
+        ctx_user    = f"O usuário é do curso {curso_title}.\n" if curso_title else ""
+
+        with self.medir("prompt"):
+            # 3) Contexto: candidatos das três fontes, sem repetidos, reordenados e
+            #    empacotados até o orçamento de tokens
+            trechos = [
+                Trecho(d.page_content, fonte, vetor=v)
+                for fonte in ("faq", "legal", "planos") for d, v in pares.get(fonte, [])
+            ]
+            contexto = self.montador.montar(pergunta, emb_perg, trechos)
+
+            # 4) Histórico: últimas 6 mensagens, aparadas pelo mesmo orçamento
+            historico_txt = self.montador.historico(historico)
+
+            # 5) Monta prompt para Groq
+            system = (
+                f"{ctx_user}"
+            "Você é o JOTHA, assistente virtual da Coordenação de Estágio do IF Sudeste MG - Campus Barbacena.\n"
+            "Responda com simpatia, emoji e objetividade. Baseie-se apenas no contexto fornecido e nos documentos internos.\n"
+            "Não consulte fontes externas nem invente informações.\n"
+            "Se a informação não estiver no contexto, oriente o usuário a consultar o site oficial: https://www.ifsudestemg.edu.br/barbacena.\n"
+            )
+            user = f"""
+Histórico:
+{historico_txt}
+
+Contexto:
+{contexto}
+
+Pergunta:
+{pergunta}
+
+Resposta:
+"""
+            return [
+                {"role": "system", "content": system},
+                {"role": "user",   "content": user},
+            ]
+
+    # --- Chamada ao LLM (com ou sem streaming) ---
+    def chamar_llm(self, mensagens, stream: bool = False):
+        return self.cliente.chat.completions.create(
+            model=MODELO_LLM,
+            messages=mensagens,
+            temperature=0.3,
+            max_tokens=512,
+            stream=stream,
+        )
+
+    # --- Guarda a resposta do LLM no cache semântico do curso ---
+    def guardar_no_cache(self, curso: str, pergunta: str, emb_perg, resposta: str):
+        if self.cache is not None and resposta:
+            self.cache.guardar(normalize_string(curso or ""), pergunta, emb_perg, resposta)
+
+    # --- Tokens gastos numa chamada (quando a API informa o uso) ---
+    def contar_tokens(self, uso):
+        if uso is not None:
+            self.contar("tokens_llm", getattr(uso, "prompt_tokens", 0) or 0, tipo="prompt")
+            self.contar("tokens_llm", getattr(uso, "completion_tokens", 0) or 0, tipo="resposta")
+
+    # --- Prepara (embutindo só se a tabela do FAQ não resolver), contando a rota escolhida ---
+    def _preparar_turno(self, pergunta: str, curso: str, historico: list):
+        with self.medir("preparo"):
+            preparo = self.preparar(pergunta, curso, historico)
+        self.contar("respostas", rota=preparo.rota)
+        return preparo.emb_perg, preparo
+
+    # --- Responde com RAG + fallback FAQ: (texto, encontrado, rota) ---
+    def responder(self, pergunta: str, curso: str = "", historico: list = None):
+        emb_perg, preparo = self._preparar_turno(pergunta, curso, historico)
+        if preparo.mensagens is None:
+            return preparo.texto, preparo.encontrado, preparo.rota
+        with self.medir("llm"):
+            rsp = self.chamar_llm(preparo.mensagens)
+        self.contar_tokens(getattr(rsp, "usage", None))
+        texto = rsp.choices[0].message.content.strip()
+        self.guardar_no_cache(curso, pergunta, emb_perg, texto)
+        return texto, True, ROTA_RAG
+
+    # --- Versão em streaming: gerador de trechos quando vai ao LLM;
+    #     FAQ exato, cache e fallbacks continuam voltando como texto imediato ---
+    def responder_stream(self, pergunta: str, curso: str = "", historico: list = None):
+        emb_perg, preparo = self._preparar_turno(pergunta, curso, historico)
+        if preparo.mensagens is None:
+            return preparo.texto, preparo.encontrado, preparo.rota
+
+        def trechos():
+            partes = []
+            with self.medir("llm"):
+                for chunk in self.chamar_llm(preparo.mensagens, stream=True):
+                    # o Groq manda o uso de tokens no último trecho (x_groq.usage)
+                    self.contar_tokens(getattr(getattr(chunk, "x_groq", None), "usage", None))
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        partes.append(delta)
+                        yield delta
+            # só guarda no cache respostas que chegaram completas
+            self.guardar_no_cache(curso, pergunta, emb_perg, "".join(partes).strip())
+
+        return trechos(), True, ROTA_RAG
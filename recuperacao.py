@@ -0,0 +1,30 @@
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+# --- Etapa de recuperação concorrente: consulta várias fontes ao mesmo tempo ---
+# Cada fonte é uma função sem argumentos que devolve uma lista de documentos.
+# A busca no FAISS libera o GIL, então threads bastam para paralelizar as fontes.
+# Não depende do Streamlit: serve tanto ao app quanto a scripts e serviços.
+
+# Pool compartilhado pelo processo (várias sessões do Streamlit usam o mesmo)
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="recuperacao")
+
+
+# --- Devolve {fonte: docs}; fonte que falha ou estoura o tempo vira [] ---
+def recuperar_concorrente(buscas: dict, timeout: float = 5.0) -> dict:
+    futuros = {nome: _executor.submit(fn) for nome, fn in buscas.items()}
+    prazo = time.monotonic() + timeout
+    resultados = {}
+    for nome, futuro in futuros.items():
+        try:
+            resultados[nome] = futuro.result(timeout=max(0.0, prazo - time.monotonic()))
+        except TimeoutError:
+            logging.warning(f"Recuperação em '{nome}' excedeu {timeout:.1f}s; seguindo sem ela.")
+            futuro.cancel()
+            resultados[nome] = []
+        except Exception:
+            logging.exception(f"Falha na recuperação em '{nome}'; seguindo sem ela.")
+            resultados[nome] = []
+    return resultados
+
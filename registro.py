@@ -0,0 +1,122 @@
+import os
+import re
+import csv
+import io
+import time
+import sqlite3
+import hashlib
+import threading
+from indices import normalize_string
+
+# --- Registro de perguntas não respondidas ---
+# SQLite em modo WAL: várias sessões do Streamlit gravam ao mesmo tempo sem perder
+# linhas, e cada gravação é um único INSERT (nada de reescrever o arquivo inteiro).
+# A chave primária é o hash do curso + pergunta normalizada, então a deduplicação é
+# O(1): a mesma pergunta do mesmo curso só incrementa o contador e atualiza a data, e
+# cada curso conta as suas (a mesma dúvida em dois cursos são duas linhas).
+
+VERSAO_ESQUEMA = 1  # 1: curso entra no hash (antes era só a pergunta)
+
+# --- Hash do curso + pergunta normalizada (sem acentos, caixa, pontuação e espaços extras) ---
+def hash_pergunta(pergunta: str, curso: str = "") -> str:
+    texto = normalize_string(pergunta).replace("_", " ")
+    texto = re.sub(r"[^\w\s]", " ", texto)
+    texto = " ".join(texto.split())
+    return hashlib.sha1(f"{normalize_string(curso)}\n{texto}".encode("utf-8")).hexdigest()
+
+
+class RegistroNaoRespondidas:
+    def __init__(self, caminho: str = "data/nao_respondido.sqlite", csv_legado: str = "data/nao_respondido.csv"):
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        novo = not os.path.exists(caminho)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(caminho, check_same_thread=False, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS perguntas (
+                hash TEXT PRIMARY KEY,
+                pergunta TEXT NOT NULL,
+                curso TEXT NOT NULL DEFAULT '',
+                primeira_vez REAL NOT NULL,
+                ultima_vez REAL NOT NULL,
+                vezes INTEGER NOT NULL DEFAULT 1
+            );
+            CREATE INDEX IF NOT EXISTS idx_perguntas_ultima ON perguntas (ultima_vez);
+            CREATE INDEX IF NOT EXISTS idx_perguntas_curso ON perguntas (curso);
+        """)
+        self._db.commit()
+        self._migrar()
+        if novo and os.path.exists(csv_legado):
+            self._importar_csv(csv_legado)
+
+    # --- Bancos antigos: recalcula os hashes com o curso (as linhas já eram únicas) ---
+    def _migrar(self):
+        with self._lock:
+            if self._db.execute("PRAGMA user_version").fetchone()[0] >= VERSAO_ESQUEMA:
+                return
+            linhas = self._db.execute("SELECT rowid, pergunta, curso FROM perguntas").fetchall()
+            self._db.executemany(
+                "UPDATE perguntas SET hash = ? WHERE rowid = ?",
+                [(hash_pergunta(pergunta, curso), rowid) for rowid, pergunta, curso in linhas]
+            )
+            self._db.execute(f"PRAGMA user_version = {VERSAO_ESQUEMA}")
+            self._db.commit()
+
+    # --- Migra o CSV antigo (coluna 'pergunta') na primeira execução ---
+    def _importar_csv(self, caminho: str):
+        with open(caminho, encoding="utf-8") as f:
+            for linha in csv.DictReader(f):
+                if linha.get("pergunta"):
+                    self.registrar(linha["pergunta"], linha.get("curso", ""))
+
+    # --- Registra (ou incrementa) uma pergunta ---
+    def registrar(self, pergunta: str, curso: str = ""):
+        agora = time.time()
+        with self._lock:
+            self._db.execute("""
+                INSERT INTO perguntas (hash, pergunta, curso, primeira_vez, ultima_vez)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(hash) DO UPDATE SET vezes = vezes + 1, ultima_vez = excluded.ultima_vez
+            """, (hash_pergunta(pergunta, curso or ""), pergunta.strip(), curso or "", agora, agora))
+            self._db.commit()
+
+    def total(self, curso: str = None) -> int:
+        filtro, args = ("WHERE curso = ?", (curso,)) if curso else ("", ())
+        with self._lock:
+            return self._db.execute(f"SELECT COUNT(*) FROM perguntas {filtro}", args).fetchone()[0]
+
+    # --- Uma página, das mais recentes para as mais antigas ---
+    def pagina(self, pagina: int = 0, por_pagina: int = 50, curso: str = None) -> list:
+        filtro, args = ("WHERE curso = ?", (curso,)) if curso else ("", ())
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT pergunta, curso, vezes, primeira_vez, ultima_vez FROM perguntas {filtro} "
+                "ORDER BY ultima_vez DESC LIMIT ? OFFSET ?",
+                (*args, por_pagina, pagina * por_pagina)
+            ).fetchall()
+        colunas = ("pergunta", "curso", "vezes", "primeira_vez", "ultima_vez")
+        return [dict(zip(colunas, r)) for r in rows]
+
+    # --- Agregado por curso: quantas perguntas distintas e quantas ocorrências ---
+    def por_curso(self) -> list:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT curso, COUNT(*), SUM(vezes) FROM perguntas GROUP BY curso ORDER BY SUM(vezes) DESC"
+            ).fetchall()
+        return [{"curso": c or "(sem curso)", "perguntas": n, "ocorrencias": v} for c, n, v in rows]
+
+    # --- Exporta tudo em CSV (gerado sob demanda, não a cada rerun) ---
+    def exportar_csv(self) -> bytes:
+        saida = io.StringIO()
+        escritor = csv.writer(saida)
+        escritor.writerow(["pergunta", "curso", "vezes", "primeira_vez", "ultima_vez"])
+        with self._lock:
+            for pergunta, curso, vezes, primeira, ultima in self._db.execute(
+                "SELECT pergunta, curso, vezes, primeira_vez, ultima_vez FROM perguntas ORDER BY ultima_vez DESC"
+            ):
+                escritor.writerow([
+                    pergunta, curso, vezes,
+                    time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(primeira)),
+                    time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ultima)),
+                ])
+        return saida.getvalue().encode("utf-8")
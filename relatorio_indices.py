@@ -0,0 +1,92 @@
+import os
+import time
+import json
+import argparse
+import faiss
+import numpy as np
+from indices import TIPOS_INDICE, MODELO_EMBEDDINGS, parametros_indice, criar_indice_faiss
+from indexacao import PASTA_ESTADO
+
+# Compara recall e latência de cada tipo de índice contra o flat (busca exata).
+# Os índices são montados com os vetores brutos do modelo (como o salvar_indice faz)
+# e consultados com perguntas reais embutidas sem normalizar (como o motor consulta),
+# então o veredito vale para a geometria que vai para produção.
+# Uso: python relatorio_indices.py --indice vectorstore/planos_index [--perguntas data/benchmark_perguntas.jsonl]
+
+parser = argparse.ArgumentParser(description="Relatório recall x latência dos tipos de índice.")
+parser.add_argument("--indice", default="vectorstore/planos_index")
+parser.add_argument("--perguntas", default="data/benchmark_perguntas.jsonl",
+                    help="JSONL com o campo 'pergunta' (formato do benchmark) ou texto com uma pergunta por linha")
+parser.add_argument("--amostra", type=int, default=200, help="máximo de perguntas usadas")
+parser.add_argument("-k", type=int, default=4)
+parser.add_argument("--recall-minimo", type=float, default=0.95)
+parser.add_argument("--saida", default="relatorio_indices.json")
+args = parser.parse_args()
+
+# Vetores brutos da base: estado do indexador ou reconstruídos de um índice flat.
+# (o vetores.npy da pasta do índice é normalizado, para o cosseno do FAQ: não serve aqui)
+arquivo = os.path.join(args.indice, PASTA_ESTADO, "vetores.npy")
+if os.path.exists(arquivo):
+    base = np.load(arquivo)
+else:
+    flat = faiss.read_index(os.path.join(args.indice, "index.faiss"))
+    if not isinstance(flat, faiss.IndexFlat):
+        raise SystemExit(f"{args.indice} não tem {PASTA_ESTADO}/vetores.npy nem um index.faiss flat; "
+                         "reindexe com --incremental ou --tipo-indice flat para gerar o relatório.")
+    base = flat.reconstruct_n(0, flat.ntotal)
+base = np.ascontiguousarray(base, dtype="float32")
+print(f"📦 {args.indice}: {base.shape[0]} vetores de dimensão {base.shape[1]}")
+
+# Consultas: perguntas reais (fora da base), embutidas como o motor faz, sem normalizar
+with open(args.perguntas, encoding="utf-8") as f:
+    if args.perguntas.lower().endswith(".jsonl"):
+        perguntas = [json.loads(linha)["pergunta"] for linha in f if linha.strip()]
+    else:
+        perguntas = [linha.strip() for linha in f if linha.strip()]
+if len(perguntas) > args.amostra:
+    rng = np.random.default_rng(0)
+    perguntas = [perguntas[i] for i in sorted(rng.choice(len(perguntas), args.amostra, replace=False))]
+
+from langchain_huggingface import HuggingFaceEmbeddings
+emb = HuggingFaceEmbeddings(model_name=MODELO_EMBEDDINGS)
+consultas = np.ascontiguousarray(emb.embed_documents(perguntas), dtype="float32")
+
+# Gabarito: vizinhos exatos do índice flat
+gabarito = None
+resultados = []
+for tipo in TIPOS_INDICE:
+    params = parametros_indice(tipo, base.shape[0], base.shape[1])
+    inicio = time.perf_counter()
+    index = criar_indice_faiss(base, params)
+    construcao = time.perf_counter() - inicio
+
+    latencias, vizinhos = [], []
+    for q in consultas:
+        t0 = time.perf_counter()
+        _, idx = index.search(q.reshape(1, -1), args.k)
+        latencias.append((time.perf_counter() - t0) * 1000)
+        vizinhos.append(idx[0])
+    vizinhos = np.array(vizinhos)
+    if gabarito is None:
+        gabarito = vizinhos
+
+    recall = float(np.mean([len(set(v) & set(g)) / args.k for v, g in zip(vizinhos, gabarito)]))
+    resultados.append({
+        "tipo": tipo,
+        "fabrica": params["fabrica"],
+        "recall": round(recall, 4),
+        "latencia_media_ms": round(float(np.mean(latencias)), 4),
+        "latencia_p95_ms": round(float(np.percentile(latencias, 95)), 4),
+        "construcao_s": round(construcao, 3),
+        "tamanho_bytes": int(faiss.serialize_index(index).size),
+        "seguro": recall >= args.recall_minimo,
+    })
+
+print(f"\n{'tipo':<6} {'fábrica':<16} {'recall@' + str(args.k):>9} {'média ms':>9} {'p95 ms':>8} {'MB':>7}  seguro")
+for r in resultados:
+    print(f"{r['tipo']:<6} {r['fabrica']:<16} {r['recall']:>9.3f} {r['latencia_media_ms']:>9.3f} "
+          f"{r['latencia_p95_ms']:>8.3f} {r['tamanho_bytes'] / 1e6:>7.2f}  {'✅' if r['seguro'] else '❌'}")
+
+with open(args.saida, "w", encoding="utf-8") as f:
+    json.dump({"indice": args.indice, "k": args.k, "consultas": int(len(consultas)), "resultados": resultados}, f, indent=2)
+print(f"\n📝 Relatório salvo em {args.saida}")
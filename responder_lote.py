@@ -0,0 +1,225 @@
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+from collections import defaultdict, Counter
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from indices import ler_metadados, MODELO_EMBEDDINGS
+from rag import MotorRespostas, ROTA_FAQ
+from avaliacao import acertou_curso, acertou_fonte
+
+# Respostas em lote, para conferir o FAQ e os PPCs depois de uma reindexação sem
+# digitar perguntas no chat. Usa as mesmas buscas do motor (tabela do FAQ, FAQ
+# exato, RAG, não encontrado), passando o lote inteiro em vez de uma pergunta:
+#   - as perguntas são embutidas numa única chamada ao modelo;
+#   - cada índice FAISS recebe uma única busca com a matriz de perguntas (uma por
+#     partição de curso, quando o índice é particionado);
+#   - os limiares do FAQ exato são aplicados de uma vez sobre a matriz de scores;
+#   - o LLM (opcional) roda com concorrência limitada pelo DespachanteLLM.
+# O cache semântico fica de fora: cada rodada mede os índices, não respostas antigas.
+#
+# Entrada: JSONL (mesmo formato do benchmark) ou CSV com cabeçalho curso,pergunta,esperado
+# ("esperado" opcional: faq, legal ou planos).
+# Uso: python responder_lote.py perguntas.csv [--saida lote_resultado.json] [--llm nenhum|falso|groq]
+
+
+# --- Lê (curso, pergunta, esperado) de um JSONL ou CSV ---
+def ler_perguntas(caminho: str) -> list:
+    with open(caminho, encoding="utf-8", newline="") as f:
+        if caminho.lower().endswith(".csv"):
+            linhas = list(csv.DictReader(f))
+        else:
+            linhas = [json.loads(linha) for linha in f if linha.strip()]
+    return [
+        {"curso": (l.get("curso") or "").strip(), "pergunta": l["pergunta"].strip(),
+         "esperado": (l.get("esperado") or "").strip() or None}
+        for l in linhas if (l.get("pergunta") or "").strip()
+    ]
+
+
+class RespondedorLote:
+    def __init__(self, motor: MotorRespostas):
+        self.motor = motor
+        self.tempos = defaultdict(float)
+
+    def _medir(self, nome: str, inicio: float):
+        self.tempos[nome] += time.perf_counter() - inicio
+
+    # --- Roteia o lote inteiro: lista de Preparo na ordem dos itens (sem chamar o LLM) ---
+    def preparar(self, itens: list) -> list:
+        motor = self.motor
+        preparos = [None] * len(itens)
+
+        # 0) Tabela do FAQ por chave: resolve sem embedding
+        inicio = time.perf_counter()
+        if motor.tabela_faq is not None:
+            for j, item in enumerate(itens):
+                i = motor.tabela_faq.buscar_chave(item["pergunta"], item["curso"])
+                if i is not None:
+                    preparos[j] = motor.preparo_faq(motor.tabela_faq.documento(i))
+        self._medir("faq_tabela", inicio)
+        pendentes = [j for j, p in enumerate(preparos) if p is None]
+        if not pendentes:
+            return preparos
+        perguntas = [itens[j]["pergunta"] for j in pendentes]
+        cursos = [itens[j]["curso"] for j in pendentes]
+
+        # 1) Uma única chamada ao modelo para todas as perguntas restantes
+        inicio = time.perf_counter()
+        embs = np.asarray(motor.embeddings.embed_documents(perguntas), dtype="float32")
+        self._medir("embed", inicio)
+
+        # 2) FAQ exato
+        inicio = time.perf_counter()
+        for j, emb, doc in zip(pendentes, embs, motor.buscar_faq_exata_lote(perguntas, cursos, embs)):
+            if doc is not None:
+                preparos[j] = motor.preparo_faq(doc, emb)
+        self._medir("faq_exata", inicio)
+
+        # 3) RAG: as três fontes, uma busca por índice (ou partição)
+        inicio = time.perf_counter()
+        restantes = [r for r, j in enumerate(pendentes) if preparos[j] is None]
+        if restantes:
+            fontes = motor.recuperar_fontes_lote(
+                embs[restantes], [cursos[r] for r in restantes], [perguntas[r] for r in restantes]
+            )
+            for r, pares in zip(restantes, fontes):
+                preparos[pendentes[r]] = motor.preparo_fontes(perguntas[r], cursos[r], [], pares, embs[r])
+        self._medir("recuperacao", inicio)
+        return preparos
+
+    # --- Gera as respostas das perguntas que foram ao RAG, com concorrência limitada ---
+    def gerar(self, preparos: list, concorrencia: int) -> dict:
+        posicoes = [j for j, p in enumerate(preparos) if p.mensagens is not None]
+
+        def uma(j):
+            try:
+                rsp = self.motor.chamar_llm(preparos[j].mensagens)
+                return rsp.choices[0].message.content.strip()
+            except Exception as e:
+                return f"[erro] {type(e).__name__}: {e}"
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concorrencia, thread_name_prefix="lote_llm") as executor:
+            respostas = dict(zip(posicoes, executor.map(uma, posicoes)))
+        self._medir("llm", inicio)
+        return respostas
+
+
+# --- Cliente do LLM para o lote: nenhum, Groq simulado ou Groq real, atrás do despachante ---
+def criar_cliente(modo: str, args):
+    if modo == "nenhum":
+        return None
+    from despacho import DespachanteLLM
+    if modo == "falso":
+        from groq_falso import GroqFalso
+        cliente = GroqFalso(latencia=args.latencia_llm)
+    else:
+        from dotenv import load_dotenv
+        from groq import Groq
+        load_dotenv()
+        cliente = Groq(api_key=os.environ["GROQ_API"])
+    return DespachanteLLM(cliente, max_concorrencia=args.concorrencia_llm,
+                          requisicoes_por_minuto=args.rpm, tokens_por_minuto=args.tpm)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Responde um lote de perguntas e relata rotas e acertos.")
+    parser.add_argument("perguntas", help="JSONL ou CSV com curso, pergunta e esperado (opcional)")
+    parser.add_argument("--raiz", default="vectorstore", help="pasta com faq_index, legal_index e planos_index")
+    parser.add_argument("--saida", default="lote_resultado.json")
+    parser.add_argument("--llm", choices=("nenhum", "falso", "groq"), default="nenhum",
+                        help="gera as respostas do RAG (falso: Groq simulado; groq: GROQ_API no ambiente/.env)")
+    parser.add_argument("--concorrencia-llm", type=int, default=4, help="chamadas abertas ao LLM ao mesmo tempo")
+    parser.add_argument("--rpm", type=float, default=30, help="limite de requisições por minuto ao Groq")
+    parser.add_argument("--tpm", type=float, default=30000, help="limite de tokens por minuto ao Groq")
+    parser.add_argument("--latencia-llm", type=float, default=0.0, help="latência simulada do Groq falso (s)")
+    args = parser.parse_args()
+
+    itens = ler_perguntas(args.perguntas)
+    if not itens:
+        sys.exit(f"Nenhuma pergunta em {args.perguntas}")
+
+    # --- Carga: modelo + índices ---
+    inicio = time.perf_counter()
+    from langchain_huggingface import HuggingFaceEmbeddings
+    motor = MotorRespostas(lambda: HuggingFaceEmbeddings(model_name=MODELO_EMBEDDINGS),
+                           cliente=criar_cliente(args.llm, args), raiz=args.raiz)
+    motor.aguardar()
+    if not motor.pronto():
+        sys.exit(f"Falha ao carregar os índices: {motor.estado_carregamento()}")
+    carga_s = time.perf_counter() - inicio
+
+    # --- Execução ---
+    lote = RespondedorLote(motor)
+    inicio = time.perf_counter()
+    preparos = lote.preparar(itens)
+    respostas = lote.gerar(preparos, args.concorrencia_llm) if motor.cliente is not None else {}
+    total_s = time.perf_counter() - inicio
+
+    # --- Relatório: rota e acerto por pergunta, resumo por curso ---
+    rotas = Counter(p.rota for p in preparos)
+    por_curso = defaultdict(lambda: {"perguntas": 0, "acertos_curso": 0, "com_esperado": 0, "acertos_fonte": 0})
+    linhas, erros = [], []
+    for j, (item, preparo) in enumerate(zip(itens, preparos)):
+        stats = por_curso[item["curso"]]
+        stats["perguntas"] += 1
+        stats["acertos_curso"] += acertou_curso(preparo, item["curso"])
+        linha = {
+            **item,
+            "rota": preparo.rota,
+            "fontes": {fonte: len(docs) for fonte, docs in preparo.docs.items()},
+        }
+        if item["esperado"]:
+            linha["acerto"] = acertou_fonte(preparo, item["esperado"])
+            stats["com_esperado"] += 1
+            stats["acertos_fonte"] += linha["acerto"]
+            if not linha["acerto"]:
+                erros.append(linha)
+        if j in respostas:
+            linha["resposta"] = respostas[j]
+        elif preparo.rota == ROTA_FAQ:
+            linha["resposta"] = preparo.texto
+        linhas.append(linha)
+
+    for stats in por_curso.values():
+        stats["taxa_acerto_curso"] = round(stats["acertos_curso"] / stats["perguntas"], 3)
+        if stats["com_esperado"]:
+            stats["taxa_acerto_fonte"] = round(stats["acertos_fonte"] / stats["com_esperado"], 3)
+
+    resultado = {
+        "config": {
+            "perguntas": args.perguntas,
+            "llm": args.llm,
+            "indices": {
+                nome: ler_metadados(os.path.join(args.raiz, nome))
+                for nome in ("faq_index", "legal_index", "planos_index")
+            },
+        },
+        "carga_s": round(carga_s, 3),
+        "total_s": round(total_s, 3),
+        "perguntas_por_s": round(len(itens) / total_s, 1) if total_s else None,
+        "etapas_s": {nome: round(s, 3) for nome, s in lote.tempos.items()},
+        "rotas": {rota: {"n": n, "fracao": round(n / len(itens), 3)} for rota, n in rotas.most_common()},
+        "por_curso": dict(sorted(por_curso.items())),
+        "erros": erros,
+        "itens": linhas,
+    }
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+
+    print(f"⏱️ {len(itens)} perguntas em {total_s:.2f}s (carga {carga_s:.2f}s)")
+    for nome, s in resultado["etapas_s"].items():
+        print(f"  {nome:<12} {s:>8.3f} s")
+    print("🔀 Rotas: " + ", ".join(f"{r} {v['fracao']:.0%}" for r, v in resultado["rotas"].items()))
+    com_esperado = sum(s["com_esperado"] for s in por_curso.values())
+    if com_esperado:
+        print(f"🎯 Fonte esperada: {com_esperado - len(erros)}/{com_esperado} acertos")
+    print(f"📝 Relatório salvo em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
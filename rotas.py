@@ -0,0 +1,7 @@
+# --- Rotas possíveis de uma resposta ---
+# Módulo sem dependências: o app usa as rotas mesmo quando é só cliente do serviço.
+ROTA_FAQ = "faq_exata"
+ROTA_CACHE = "cache"
+ROTA_RAG = "rag"
+ROTA_NAO_ENCONTRADO = "nao_encontrado"
+ROTA_CARREGANDO = "carregando"  # modelo/índices ainda carregando: não é pergunta sem resposta
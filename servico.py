@@ -0,0 +1,235 @@
+import os
+import json
+import asyncio
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+# --- Serviço de respostas do JOTHA, fora do Streamlit ---
+# ServicoRespostas é a API assíncrona em processo: recebe curso, pergunta e histórico
+# explicitamente e roda o motor (embed, FAISS/BM25, Groq) num pool de threads, então
+# um único processo com o modelo e os índices carregados atende várias requisições
+# ao mesmo tempo. criar_app() expõe o serviço como uma aplicação ASGI mínima (sem
+# framework), para várias réplicas do app.py usarem o mesmo backend:
+#
+#   POST /responder   {"pergunta", "curso", "historico", "stream"}
+#                     -> {"texto", "encontrado", "rota"}  ou, com stream, NDJSON:
+#                        {"encontrado": ..., "rota": ...} seguido de {"trecho": "..."} por linha;
+#                        se o Groq falhar no meio, a última linha é {"erro": "..."}.
+#                        Texto pronto (FAQ, cache, fallbacks) vem inteiro no cabeçalho:
+#                        {"encontrado": ..., "rota": ..., "texto": "..."}, sem trechos
+#   GET  /saude       -> {"pronto": true|false, "carregamento": {recurso: estado}}
+#   GET  /percentis?segundos=N, /contadores?nome=...&rotulo=..., /medidores, /cache -> JSON
+#   GET  /metricas    -> formato texto do Prometheus
+#
+# Uso: python servico.py [--raiz vectorstore] [--porta 8000]   (GROQ_API no ambiente/.env)
+
+_FIM = object()
+
+# --- /cache quando o serviço roda sem cache (--cache ''): mesmo formato, zerado ---
+ESTATISTICAS_SEM_CACHE = {"itens": 0, "acertos": 0, "falhas": 0, "taxa_acerto": 0.0}
+
+
+class ServicoRespostas:
+    def __init__(self, motor, metricas=None, max_concorrencia: int = 8):
+        self.motor = motor
+        self.metricas = metricas
+        self._executor = ThreadPoolExecutor(max_workers=max_concorrencia, thread_name_prefix="servico")
+
+    async def _em_thread(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def pronto(self) -> bool:
+        return self.motor.pronto()
+
+    # --- Resposta completa: (texto, encontrado, rota) ---
+    async def responder(self, pergunta: str, curso: str = "", historico: list = None):
+        return await self._em_thread(self.motor.responder, pergunta, curso or "", historico or [])
+
+    # --- Resposta em streaming: (trechos assíncronos, encontrado, rota) ---
+    # Texto pronto (FAQ exato, cache, fallbacks) volta como str, igual ao motor.
+    async def responder_stream(self, pergunta: str, curso: str = "", historico: list = None):
+        resposta, encontrado, rota = await self._em_thread(
+            self.motor.responder_stream, pergunta, curso or "", historico or []
+        )
+        if isinstance(resposta, str):
+            return resposta, encontrado, rota
+        return self._iterar_em_thread(resposta), encontrado, rota
+
+    # --- Consome um gerador síncrono (stream do Groq) numa thread, sem travar o loop ---
+    async def _iterar_em_thread(self, gerador):
+        loop = asyncio.get_running_loop()
+        fila = asyncio.Queue()
+
+        def consumir():
+            try:
+                for item in gerador:
+                    loop.call_soon_threadsafe(fila.put_nowait, item)
+            except Exception as e:
+                loop.call_soon_threadsafe(fila.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(fila.put_nowait, _FIM)
+
+        loop.run_in_executor(self._executor, consumir)
+        while True:
+            item = await fila.get()
+            if item is _FIM:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+
+# --- Aplicação ASGI sobre o serviço ---
+def criar_app(servico: ServicoRespostas):
+    async def ler_corpo(receive) -> bytes:
+        corpo = b""
+        while True:
+            msg = await receive()
+            corpo += msg.get("body", b"")
+            if not msg.get("more_body"):
+                return corpo
+
+    async def enviar(send, status: int, corpo, tipo: str = "application/json"):
+        if not isinstance(corpo, (bytes, str)):
+            corpo = json.dumps(corpo, ensure_ascii=False)
+        if isinstance(corpo, str):
+            corpo = corpo.encode("utf-8")
+        await send({"type": "http.response.start", "status": status,
+                    "headers": [(b"content-type", f"{tipo}; charset=utf-8".encode())]})
+        await send({"type": "http.response.body", "body": corpo})
+
+    async def responder(dados: dict, send):
+        pergunta = (dados.get("pergunta") or "").strip()
+        if not pergunta:
+            return await enviar(send, 400, {"erro": "pergunta vazia"})
+        curso, historico = dados.get("curso") or "", dados.get("historico") or []
+
+        if not dados.get("stream"):
+            texto, encontrado, rota = await servico.responder(pergunta, curso, historico)
+            return await enviar(send, 200, {"texto": texto, "encontrado": encontrado, "rota": rota})
+
+        trechos, encontrado, rota = await servico.responder_stream(pergunta, curso, historico)
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/x-ndjson; charset=utf-8")]})
+
+        def linha(obj) -> bytes:
+            return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+        if isinstance(trechos, str):
+            cabecalho = {"encontrado": encontrado, "rota": rota, "texto": trechos}
+            return await send({"type": "http.response.body", "body": linha(cabecalho)})
+
+        await send({"type": "http.response.body", "body": linha({"encontrado": encontrado, "rota": rota}), "more_body": True})
+        # a resposta já começou: uma falha daqui em diante vira uma linha de erro no
+        # próprio NDJSON (um segundo http.response.start quebraria o protocolo ASGI)
+        try:
+            async for trecho in trechos:
+                await send({"type": "http.response.body", "body": linha({"trecho": trecho}), "more_body": True})
+        except Exception:
+            logging.exception("Falha no streaming de /responder")
+            await send({"type": "http.response.body", "body": linha({"erro": "falha interna"}), "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def app(scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                msg = await receive()
+                if msg["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif msg["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        metodo, caminho = scope["method"], scope["path"]
+        params = {k: v[0] for k, v in parse_qs(scope.get("query_string", b"").decode()).items()}
+        metricas = servico.metricas
+        try:
+            if metodo == "POST" and caminho == "/responder":
+                return await responder(json.loads(await ler_corpo(receive) or b"{}"), send)
+            if metodo == "GET" and caminho == "/saude":
+                return await enviar(send, 200, {"pronto": servico.pronto(),
+                                                "carregamento": servico.motor.estado_carregamento()})
+            if metodo == "GET" and caminho == "/cache":
+                cache = servico.motor.cache
+                return await enviar(send, 200, cache.estatisticas() if cache else ESTATISTICAS_SEM_CACHE)
+            if metodo == "GET" and metricas is not None:
+                if caminho == "/percentis":
+                    segundos = float(params["segundos"]) if params.get("segundos") else None
+                    return await enviar(send, 200, metricas.percentis(segundos))
+                if caminho == "/contadores":
+                    return await enviar(send, 200, metricas.contadores(params.get("nome", ""), params.get("rotulo")))
+                if caminho == "/medidores":
+                    return await enviar(send, 200, metricas.medidores())
+                if caminho == "/metricas":
+                    return await enviar(send, 200, metricas.exportar_prometheus(), "text/plain")
+            return await enviar(send, 404, {"erro": f"rota desconhecida: {metodo} {caminho}"})
+        except json.JSONDecodeError:
+            return await enviar(send, 400, {"erro": "JSON inválido"})
+        except Exception:
+            logging.exception(f"Falha em {metodo} {caminho}")
+            return await enviar(send, 500, {"erro": "falha interna"})
+
+    return app
+
+
+# --- Monta motor, cache e métricas a partir do ambiente (sem st.secrets) ---
+def criar_servico(raiz: str = "vectorstore", cache: str = "data/cache_respostas.sqlite",
+                  max_concorrencia: int = 8, timeout_recuperacao: float = 5.0,
+                  max_concorrencia_llm: int = 4, requisicoes_por_minuto: float = 30,
+                  tokens_por_minuto: float = 30000) -> ServicoRespostas:
+    from dotenv import load_dotenv
+    from groq import Groq
+    from langchain_huggingface import HuggingFaceEmbeddings
+    from indices import MODELO_EMBEDDINGS
+    from cache_respostas import CacheRespostas
+    from despacho import DespachanteLLM
+    from metricas import RegistroMetricas
+    from rag import MotorRespostas
+
+    load_dotenv()
+    metricas = RegistroMetricas()
+    motor = MotorRespostas(
+        lambda: HuggingFaceEmbeddings(model_name=MODELO_EMBEDDINGS),
+        cliente=DespachanteLLM(
+            Groq(api_key=os.environ["GROQ_API"]),
+            max_concorrencia=max_concorrencia_llm,
+            requisicoes_por_minuto=requisicoes_por_minuto,
+            tokens_por_minuto=tokens_por_minuto,
+            medir=metricas.medir,
+            contar=metricas.contar,
+            medidor=metricas.medidor,
+        ),
+        cache=CacheRespostas(cache, raiz_indices=raiz) if cache else None,
+        raiz=raiz,
+        timeout_recuperacao=timeout_recuperacao,
+        medir=metricas.medir,
+        contar=metricas.contar,
+    )
+    return ServicoRespostas(motor, metricas, max_concorrencia)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serviço HTTP de respostas do JOTHA (ASGI).")
+    parser.add_argument("--raiz", default="vectorstore", help="pasta com faq_index, legal_index e planos_index")
+    parser.add_argument("--cache", default="data/cache_respostas.sqlite", help="SQLite do cache ('' desativa)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8000)
+    parser.add_argument("--concorrencia", type=int, default=8, help="respostas processadas ao mesmo tempo")
+    parser.add_argument("--concorrencia-llm", type=int, default=4, help="chamadas abertas ao Groq ao mesmo tempo")
+    parser.add_argument("--rpm", type=float, default=30, help="limite de requisições por minuto ao Groq")
+    parser.add_argument("--tpm", type=float, default=30000, help="limite de tokens por minuto ao Groq")
+    args = parser.parse_args()
+
+    import uvicorn
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    servico = criar_servico(args.raiz, args.cache, args.concorrencia, max_concorrencia_llm=args.concorrencia_llm,
+                            requisicoes_por_minuto=args.rpm, tokens_por_minuto=args.tpm)
+    uvicorn.run(criar_app(servico), host=args.host, port=args.porta)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import os
+import re
+import json
+import hashlib
+import numpy as np
+from langchain_core.documents import Document
+from indices import normalize_string, normalizar_linhas
+from lexico import STOPWORDS, palavras, radical
+
+# --- Tabela de respostas do FAQ, gerada pelo faq_indexer.py ---
+# Cada bloco numerado do FAQ vira uma linha com a pergunta, a resposta já limpa
+# (sem "N. " nem "metadado:"), o curso normalizado e duas chaves da pergunta:
+#   exata  -> sem acentos, caixa e pontuação ("Qual a carga horária?" == "qual a carga horaria")
+#   termos -> conjunto de radicais fora de ordem (sem artigos; ver STOPWORDS_CHAVE)
+# No app, a pergunta é resolvida primeiro por dicionário (curso, chave) -> linha, sem
+# embedding nem FAISS; depois pela similaridade com os embeddings das perguntas
+# (uma multiplicação de matriz); só então pela busca híbrida nos blocos.
+#
+# Arquivos na pasta do índice do FAQ (trocados junto com ele):
+#   tabela_faq.json -> [{"pergunta", "resposta", "curso", "hash_bloco"}]
+#   tabela_faq.npy  -> embedding normalizado de cada pergunta (mesma ordem)
+
+ARQUIVO_TABELA = "tabela_faq.json"
+ARQUIVO_VETORES = "tabela_faq.npy"
+
+# A chave de termos responde sem embedding, então só ignora artigos e "de/do/da":
+# negações (não, sem), interrogativos (quando, onde, como) e preposições mudam a
+# pergunta ("estágio com remuneração" != "estágio sem remuneração").
+STOPWORDS_CHAVE = frozenset("a o as os um uma uns umas e de da das do dos".split())
+
+
+# --- Limpa um bloco do FAQ para exibição: tira o "N. " inicial e o "metadado:" final ---
+def limpar_bloco_faq(texto: str) -> str:
+    texto = texto.split("metadado:")[0]                    # remove tudo após "metadado:"
+    return re.sub(r"^\s*\d+\.\s*", "", texto).strip()      # remove prefixo "N. "
+
+
+# --- Pergunta de um bloco: primeira linha (até o primeiro "?", se houver) ---
+def pergunta_do_bloco(texto: str) -> str:
+    primeira = limpar_bloco_faq(texto).split("\n", 1)[0]
+    return primeira.split("?", 1)[0] + "?" if "?" in primeira else primeira
+
+
+def chave_exata(texto: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", normalize_string(texto)))
+
+
+def chave_termos(texto: str) -> str:
+    # palavras funcionais ficam inteiras ("como" não vira "com"); as demais viram radical
+    termos = {t if t in STOPWORDS else radical(t) for t in palavras(texto) if t not in STOPWORDS_CHAVE}
+    return " ".join(sorted(termos))
+
+
+def hash_bloco(texto: str) -> str:
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+# --- Grava a tabela a partir dos blocos do FAQ (embute só as perguntas) ---
+def salvar_tabela(pasta: str, docs, embeddings):
+    linhas = [
+        {
+            "pergunta": pergunta_do_bloco(d.page_content),
+            "resposta": limpar_bloco_faq(d.page_content),
+            "curso": normalize_string(d.metadata.get("curso", "")),
+            "hash_bloco": hash_bloco(d.page_content),
+        }
+        for d in docs
+    ]
+    vetores = embeddings.embed_documents([l["pergunta"] for l in linhas]) if linhas else []
+    with open(os.path.join(pasta, ARQUIVO_TABELA), "w", encoding="utf-8") as f:
+        json.dump(linhas, f, ensure_ascii=False, indent=1)
+    np.save(os.path.join(pasta, ARQUIVO_VETORES), normalizar_linhas(vetores).reshape(len(linhas), -1))
+
+
+class TabelaFAQ:
+    def __init__(self, linhas: list, vetores):
+        self.linhas = linhas
+        self.vetores = vetores
+        self.exatas, self.termos, self.por_curso, self.por_bloco = {}, {}, {}, {}
+        for i, l in enumerate(linhas):
+            # a primeira ocorrência vence (mesma ordem do PDF)
+            self.exatas.setdefault((l["curso"], chave_exata(l["pergunta"])), i)
+            chave = chave_termos(l["pergunta"])
+            if chave:
+                self.termos.setdefault((l["curso"], chave), i)
+            self.por_curso.setdefault(l["curso"], []).append(i)
+            self.por_bloco[l["hash_bloco"]] = i
+        self.por_curso = {c: np.array(idx) for c, idx in self.por_curso.items()}
+
+    # --- Carrega a tabela da pasta do FAQ; None se o índice é anterior a ela ---
+    @classmethod
+    def carregar(cls, pasta: str):
+        try:
+            with open(os.path.join(pasta, ARQUIVO_TABELA), encoding="utf-8") as f:
+                linhas = json.load(f)
+            vetores = np.load(os.path.join(pasta, ARQUIVO_VETORES), mmap_mode="r")
+        except FileNotFoundError:
+            return None
+        return cls(linhas, vetores)
+
+    # --- Linha como Document (mesmo formato dos resultados do FAISS) ---
+    def documento(self, i: int) -> Document:
+        l = self.linhas[i]
+        return Document(page_content=l["resposta"], metadata={"fonte": "faq", "curso": l["curso"], "limpo": True})
+
+    # --- Pergunta igual (ou com os mesmos termos): curso do usuário, depois 'geral' ---
+    def buscar_chave(self, pergunta: str, curso: str):
+        exata, termos = chave_exata(pergunta), chave_termos(pergunta)
+        for c in (normalize_string(curso), "geral"):
+            i = self.exatas.get((c, exata))
+            if i is None and termos:
+                i = self.termos.get((c, termos))
+            if i is not None:
+                return i
+        return None
+
+    # --- Perguntas parecidas: cosseno contra as perguntas do curso (senão 'geral') ---
+    # consultas já normalizadas (uma por linha); um produto de matrizes por curso.
+    # Devolve, por pergunta, a linha da tabela ou None.
+    def buscar_similar_lote(self, consultas, cursos: list, limiar: float) -> list:
+        achados = [None] * len(cursos)
+        if not len(self.vetores):
+            return achados
+        grupos = {}
+        for j, curso in enumerate(cursos):
+            curso = normalize_string(curso)
+            grupos.setdefault(curso if curso in self.por_curso else "geral", []).append(j)
+        for curso, grupo in grupos.items():
+            linhas = self.por_curso.get(curso)
+            if linhas is None:
+                continue
+            scores = consultas[grupo] @ np.asarray(self.vetores[linhas]).T
+            melhores = scores.argmax(axis=1)
+            for j, m, score in zip(grupo, melhores, scores[np.arange(len(grupo)), melhores]):
+                if score > limiar:
+                    achados[j] = int(linhas[m])
+        return achados
+
+    # --- Resposta limpa de um bloco achado pela busca vetorial (None se não estiver na tabela) ---
+    def resposta_do_bloco(self, texto: str):
+        i = self.por_bloco.get(hash_bloco(texto))
+        return None if i is None else self.linhas[i]["resposta"]
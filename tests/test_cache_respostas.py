@@ -0,0 +1,45 @@
+import time
+import cache_respostas
+from cache_respostas import CacheRespostas
+
+# Testes do cache semântico num SQLite temporário, com vetores fixos (sem modelo).
+
+VETOR = [1.0, 0.0, 0.0, 0.0]
+PARECIDO = [0.99, 0.05, 0.0, 0.0]
+
+
+# --- Cache com uma resposta guardada para "informatica" e uma raiz de índices própria ---
+def criar_cache(tmp_path, **kwargs) -> CacheRespostas:
+    raiz = tmp_path / "vectorstore" / "faq_index"
+    raiz.mkdir(parents=True, exist_ok=True)
+    (raiz / "index.faiss").write_bytes(b"v1")
+    cache = CacheRespostas(str(tmp_path / "cache.sqlite"), raiz_indices=str(tmp_path / "vectorstore"),
+                           limiar=0.95, checar_indices_a_cada=0, **kwargs)
+    cache.guardar("informatica", "Quantas horas de estágio?", VETOR, "São 300 horas.")
+    return cache
+
+
+def test_resposta_expira_pelo_ttl_mesmo_ja_em_memoria(tmp_path, monkeypatch):
+    cache = criar_cache(tmp_path, ttl_segundos=60)
+    # o acerto monta a matriz em memória do curso
+    assert cache.buscar("informatica", PARECIDO) == "São 300 horas."
+
+    agora = time.time()
+    monkeypatch.setattr(cache_respostas.time, "time", lambda: agora + 61)
+    assert cache.buscar("informatica", PARECIDO) is None
+    assert cache.estatisticas()["acertos"] == 1
+
+
+def test_outro_curso_nao_aproveita_a_resposta(tmp_path):
+    cache = criar_cache(tmp_path)
+    assert cache.buscar("agronomia", VETOR) is None
+
+
+def test_mudanca_nos_indices_esvazia_o_cache(tmp_path):
+    cache = criar_cache(tmp_path)
+    assert cache.buscar("informatica", VETOR) == "São 300 horas."
+
+    # reindexação: o index.faiss muda de tamanho (e de mtime)
+    (tmp_path / "vectorstore" / "faq_index" / "index.faiss").write_bytes(b"v2 maior")
+    assert cache.buscar("informatica", VETOR) is None
+    assert cache.estatisticas()["itens"] == 0
@@ -0,0 +1,122 @@
+import time
+import threading
+import pytest
+from despacho import DespachanteLLM, BaldeTokens
+from groq_falso import GroqFalso, ErroGroqFalso
+
+# Testes do despachante contra o Groq simulado: nenhuma chamada sai para a rede.
+
+SEM_LIMITE = {"requisicoes_por_minuto": 1e6, "tokens_por_minuto": 1e9}
+
+
+def mensagens(texto: str = "pergunta") -> list:
+    return [{"role": "user", "content": texto}]
+
+
+# --- Roda fn(i) em n threads liberadas ao mesmo tempo; devolve os resultados em ordem ---
+def em_paralelo(n: int, fn) -> list:
+    barreira = threading.Barrier(n)
+    resultados = [None] * n
+
+    def rodar(i):
+        barreira.wait()
+        resultados[i] = fn(i)
+
+    threads = [threading.Thread(target=rodar, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+    return resultados
+
+
+# --- Falha com 429 nas primeiras 'falhas' chamadas, depois delega ao Groq simulado ---
+class FalhaAntes:
+    def __init__(self, falhas: int):
+        self.falhas = falhas
+        self.tentativas = 0
+        self.falso = GroqFalso()
+        self.chat = self
+
+    @property
+    def completions(self):
+        return self
+
+    def create(self, **kwargs):
+        self.tentativas += 1
+        if self.tentativas <= self.falhas:
+            raise ErroGroqFalso(429)
+        return self.falso.chat.completions.create(**kwargs)
+
+
+def test_chamadas_iguais_em_voo_viram_uma():
+    falso = GroqFalso(latencia=0.3)
+    despachante = DespachanteLLM(falso, **SEM_LIMITE)
+    respostas = em_paralelo(10, lambda i: despachante.chat.completions.create(model="m", messages=mensagens()))
+    assert falso.chamadas == 1
+    assert all(r is respostas[0] for r in respostas)
+
+
+def test_streaming_igual_compartilha_os_trechos():
+    falso = GroqFalso(latencia=0.3, tokens_por_segundo=100)
+    despachante = DespachanteLLM(falso, **SEM_LIMITE)
+
+    def ler(i):
+        trechos = despachante.chat.completions.create(model="m", messages=mensagens(), stream=True)
+        return "".join(t.choices[0].delta.content for t in trechos)
+
+    textos = em_paralelo(5, ler)
+    assert falso.chamadas == 1
+    assert textos == [falso.resposta] * 5
+
+
+def test_chamadas_diferentes_nao_sao_juntadas():
+    falso = GroqFalso(latencia=0.1)
+    despachante = DespachanteLLM(falso, max_concorrencia=8, **SEM_LIMITE)
+    em_paralelo(4, lambda i: despachante.chat.completions.create(model="m", messages=mensagens(f"p{i}")))
+    assert falso.chamadas == 4
+
+
+def test_repete_depois_de_429():
+    cliente = FalhaAntes(falhas=2)
+    despachante = DespachanteLLM(cliente, tentativas=4, espera_base=0.01, **SEM_LIMITE)
+    resposta = despachante.chat.completions.create(model="m", messages=mensagens())
+    assert cliente.tentativas == 3
+    assert resposta.choices[0].message.content == cliente.falso.resposta
+
+
+def test_desiste_depois_das_tentativas():
+    falso = GroqFalso(taxa_erro=1.0)
+    despachante = DespachanteLLM(falso, tentativas=3, espera_base=0.01, **SEM_LIMITE)
+    with pytest.raises(ErroGroqFalso):
+        despachante.chat.completions.create(model="m", messages=mensagens())
+    assert falso.chamadas == 3
+
+
+def test_semaforo_limita_chamadas_abertas():
+    falso = GroqFalso(latencia=0.1)
+    despachante = DespachanteLLM(falso, max_concorrencia=2, **SEM_LIMITE)
+    em_paralelo(8, lambda i: despachante.chat.completions.create(model="m", messages=mensagens(f"p{i}")))
+    assert falso.chamadas == 8
+    assert falso.em_voo_max == 2
+    assert despachante.em_voo == 0 and despachante.na_fila == 0
+
+
+def test_balde_espera_reabastecer():
+    balde = BaldeTokens(taxa=20, capacidade=1)
+    inicio = time.monotonic()
+    balde.retirar(1)
+    assert time.monotonic() - inicio < 0.02
+    balde.retirar(1)
+    assert 0.03 < time.monotonic() - inicio < 0.5
+
+
+def test_limite_de_tokens_atrasa_a_proxima_chamada():
+    # 60000 tokens/min = 1000/s, balde de 10000: a primeira chamada esvazia o balde
+    # e a segunda (~200 tokens) espera ~0,2 s pela reposição
+    falso = GroqFalso()
+    despachante = DespachanteLLM(falso, requisicoes_por_minuto=1e6, tokens_por_minuto=60000)
+    despachante.chat.completions.create(model="m", messages=mensagens("a"), max_tokens=10000)
+    inicio = time.monotonic()
+    despachante.chat.completions.create(model="m", messages=mensagens("b"), max_tokens=200)
+    assert 0.15 < time.monotonic() - inicio < 1.0
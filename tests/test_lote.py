@@ -0,0 +1,100 @@
+import random
+import hashlib
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from indices import salvar_indice, salvar_particionado
+from tabela_faq import salvar_tabela
+from rag import MotorRespostas
+from responder_lote import RespondedorLote
+
+# O lote usa as buscas do motor com várias perguntas de uma vez; estes testes
+# garantem que ele roteia cada pergunta exatamente como o chat (uma por vez),
+# com e sem partições por curso e com e sem a tabela do FAQ.
+
+CURSOS = ["informática", "agronomia", "enfermagem", "geral"]
+VOCABULARIO = ("estágio horas carga remuneração seguro contrato relatório supervisor empresa "
+               "frequência avaliação lei resolução prazo documento assinatura termo convênio "
+               "férias atividade orientador matrícula disciplina").split()
+
+
+# --- Embeddings de teste: soma de um vetor fixo por palavra (frases parecidas ficam próximas) ---
+class EmbeddingsPalavras(Embeddings):
+    def _palavra(self, palavra: str):
+        semente = int(hashlib.md5(palavra.encode("utf-8")).hexdigest()[:8], 16)
+        return np.random.default_rng(semente).normal(size=32)
+
+    def _frase(self, texto: str) -> list:
+        return sum((self._palavra(p) for p in texto.lower().split()), np.zeros(32)).tolist()
+
+    def embed_documents(self, textos):
+        return [self._frase(t) for t in textos]
+
+    def embed_query(self, texto):
+        return self._frase(texto)
+
+
+def frase(rng: random.Random, n: int) -> str:
+    return " ".join(rng.sample(VOCABULARIO, n))
+
+
+@pytest.fixture(scope="module", params=[(True, True), (False, True), (True, False)],
+                ids=["particionado", "completo", "sem_tabela"])
+def cenario(request, tmp_path_factory):
+    particionar, com_tabela = request.param
+    rng = random.Random(7)
+    emb = EmbeddingsPalavras()
+    raiz = tmp_path_factory.mktemp("vectorstore")
+
+    perguntas_faq = []
+    faq = []
+    for n in range(40):
+        pergunta = frase(rng, 4) + "?"
+        perguntas_faq.append(pergunta)
+        faq.append(Document(page_content=f"{n + 1}. {pergunta}\n{frase(rng, 6)}",
+                            metadata={"curso": rng.choice(CURSOS)}))
+    fontes = {
+        "faq_index": faq,
+        "legal_index": [Document(page_content=frase(rng, 8), metadata={"curso": "geral"}) for _ in range(30)],
+        "planos_index": [Document(page_content=frase(rng, 8), metadata={"curso": rng.choice(CURSOS)})
+                         for _ in range(60)],
+    }
+    for nome, docs in fontes.items():
+        pasta = str(raiz / nome)
+        vetores = np.asarray(emb.embed_documents([d.page_content for d in docs]), dtype="float32")
+        salvar_indice(docs, vetores, pasta)
+        if particionar and nome != "legal_index":
+            salvar_particionado(docs, vetores, pasta)
+        if com_tabela and nome == "faq_index":
+            salvar_tabela(pasta, docs, emb)
+
+    # perguntas do FAQ iguais, com palavras a menos, fora de ordem ou com ruído, e perguntas soltas
+    itens = []
+    for pergunta in perguntas_faq:
+        palavras = pergunta.rstrip("?").split()
+        variantes = [pergunta, " ".join(palavras[:3]), " ".join(reversed(palavras)),
+                     " ".join(palavras + rng.sample(VOCABULARIO, 2)), frase(rng, 3)]
+        for texto in variantes:
+            itens.append({"curso": rng.choice(CURSOS + ["", "medicina"]), "pergunta": texto, "esperado": None})
+
+    motor = MotorRespostas(emb, raiz=str(raiz))
+    assert motor.aguardar(timeout=30)
+    return motor, itens
+
+
+def resumo(preparo) -> tuple:
+    docs = {fonte: [(d.page_content, d.metadata.get("curso")) for d in lista] for fonte, lista in preparo.docs.items()}
+    return preparo.rota, preparo.encontrado, preparo.texto, docs, preparo.mensagens
+
+
+def test_lote_roteia_igual_ao_motor(cenario):
+    motor, itens = cenario
+    preparos = RespondedorLote(motor).preparar(itens)
+    rotas = set()
+    for item, preparo in zip(itens, preparos):
+        esperado = motor.preparar(item["pergunta"], item["curso"], [])
+        assert resumo(preparo) == resumo(esperado), item
+        rotas.add(preparo.rota)
+    # o conjunto cobre as rotas do FAQ e do RAG
+    assert {"faq_exata", "rag"} <= rotas
@@ -0,0 +1,63 @@
+import re
+import sqlite3
+import hashlib
+from indices import normalize_string
+from registro import RegistroNaoRespondidas, VERSAO_ESQUEMA
+
+# Testes do registro de perguntas não respondidas num SQLite temporário.
+
+PERGUNTA = "Quantas horas de estágio preciso fazer?"
+
+
+# --- Hash da versão 0: só a pergunta normalizada, sem o curso ---
+def hash_v0(pergunta: str) -> str:
+    texto = " ".join(re.sub(r"[^\w\s]", " ", normalize_string(pergunta).replace("_", " ")).split())
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()
+
+
+# --- Banco da versão 0 (sem user_version) ---
+def criar_banco_v0(caminho: str, linhas: list):
+    db = sqlite3.connect(caminho)
+    db.executescript("""
+        CREATE TABLE perguntas (
+            hash TEXT PRIMARY KEY,
+            pergunta TEXT NOT NULL,
+            curso TEXT NOT NULL DEFAULT '',
+            primeira_vez REAL NOT NULL,
+            ultima_vez REAL NOT NULL,
+            vezes INTEGER NOT NULL DEFAULT 1
+        );
+    """)
+    for pergunta, curso, vezes in linhas:
+        db.execute("INSERT INTO perguntas VALUES (?, ?, ?, 0, 0, ?)", (hash_v0(pergunta), pergunta, curso, vezes))
+    db.commit()
+    db.close()
+
+
+def test_migracao_separa_a_mesma_pergunta_por_curso(tmp_path):
+    caminho = str(tmp_path / "nao_respondido.sqlite")
+    criar_banco_v0(caminho, [(PERGUNTA, "informatica", 3)])
+
+    registro = RegistroNaoRespondidas(caminho, csv_legado=str(tmp_path / "sem.csv"))
+    registro.registrar("quantas horas de estagio preciso fazer", "informatica")
+    registro.registrar(PERGUNTA, "agronomia")
+
+    assert registro.total() == 2
+    assert registro.por_curso() == [
+        {"curso": "informatica", "perguntas": 1, "ocorrencias": 4},
+        {"curso": "agronomia", "perguntas": 1, "ocorrencias": 1},
+    ]
+    versao = sqlite3.connect(caminho).execute("PRAGMA user_version").fetchone()[0]
+    assert versao == VERSAO_ESQUEMA
+
+
+def test_migracao_roda_uma_vez(tmp_path):
+    caminho = str(tmp_path / "nao_respondido.sqlite")
+    criar_banco_v0(caminho, [(PERGUNTA, "informatica", 1)])
+    RegistroNaoRespondidas(caminho, csv_legado=str(tmp_path / "sem.csv")).registrar(PERGUNTA, "informatica")
+
+    # reaberto: os hashes já estão no formato novo e a contagem continua
+    registro = RegistroNaoRespondidas(caminho, csv_legado=str(tmp_path / "sem.csv"))
+    registro.registrar(PERGUNTA, "informatica")
+    assert registro.pagina()[0]["vezes"] == 3
+    assert registro.total() == 1
@@ -0,0 +1,53 @@
+import json
+import asyncio
+from servico import ServicoRespostas, criar_app
+
+# Testes da aplicação ASGI com um motor simulado: sem modelo, índices nem servidor HTTP.
+
+
+class MotorFalso:
+    cache = None
+
+    def __init__(self, resposta, encontrado: bool = True, rota: str = "rag"):
+        self.resposta, self.encontrado, self.rota = resposta, encontrado, rota
+
+    def pronto(self) -> bool:
+        return True
+
+    def responder_stream(self, pergunta, curso, historico):
+        return self.resposta, self.encontrado, self.rota
+
+
+# --- Roda um POST /responder com stream e devolve (mensagens ASGI, linhas NDJSON) ---
+def postar_stream(motor) -> tuple:
+    app = criar_app(ServicoRespostas(motor))
+    enviados = []
+    corpo = json.dumps({"pergunta": "Quando começa o estágio?", "stream": True}).encode()
+
+    async def receive():
+        return {"type": "http.request", "body": corpo}
+
+    async def send(msg):
+        enviados.append(msg)
+
+    asyncio.run(app({"type": "http", "method": "POST", "path": "/responder"}, receive, send))
+    ndjson = b"".join(m.get("body", b"") for m in enviados).decode("utf-8")
+    return enviados, [json.loads(l) for l in ndjson.splitlines()]
+
+
+def test_falha_no_meio_do_stream_vira_linha_de_erro():
+    def trechos():
+        yield "Primeiro trecho"
+        raise RuntimeError("Groq caiu")
+
+    enviados, linhas = postar_stream(MotorFalso(trechos()))
+    assert [m["type"] for m in enviados].count("http.response.start") == 1
+    assert enviados[-1] == {"type": "http.response.body", "body": b""}
+    assert linhas[1] == {"trecho": "Primeiro trecho"}
+    assert "erro" in linhas[-1]
+
+
+def test_texto_pronto_vem_no_cabecalho_sem_trechos():
+    enviados, linhas = postar_stream(MotorFalso("⏳ Ainda estou carregando…", False, "carregando"))
+    assert linhas == [{"encontrado": False, "rota": "carregando", "texto": "⏳ Ainda estou carregando…"}]
+    assert not enviados[-1].get("more_body")
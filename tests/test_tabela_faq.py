@@ -0,0 +1,40 @@
+import numpy as np
+from tabela_faq import TabelaFAQ, chave_exata, chave_termos
+
+# Testes das chaves da tabela do FAQ: elas respondem sem embedding, então uma
+# colisão vira resposta errada com toda a confiança.
+
+
+def linha(pergunta: str, resposta: str, curso: str = "geral") -> dict:
+    return {"pergunta": pergunta, "resposta": resposta, "curso": curso, "hash_bloco": resposta}
+
+
+def test_chave_termos_ignora_artigos_e_ordem():
+    assert chave_termos("Qual a carga horária do estágio?") == chave_termos("carga horária estágio, qual?")
+    assert chave_exata("Qual a carga horária?") == chave_exata("qual a carga horaria")
+
+
+def test_chave_termos_distingue_com_e_sem():
+    assert chave_termos("Posso fazer estágio sem remuneração?") != chave_termos("Posso fazer estágio com remuneração?")
+    assert chave_termos("O estágio não é obrigatório?") != chave_termos("O estágio é obrigatório?")
+
+
+def test_chave_termos_distingue_interrogativos():
+    chaves = {chave_termos(f"{q} entrego o relatório de estágio?") for q in ("Quando", "Onde", "Como")}
+    assert len(chaves) == 3
+
+
+def test_buscar_chave_nao_cruza_perguntas_opostas():
+    linhas = [
+        linha("Posso fazer estágio com remuneração?", "Sim, com bolsa."),
+        linha("Posso fazer estágio sem remuneração?", "Sim, como estágio voluntário."),
+        linha("Quando entrego o relatório de estágio?", "Até o fim do semestre."),
+        linha("Onde entrego o relatório de estágio?", "Na coordenação."),
+    ]
+    tabela = TabelaFAQ(linhas, np.zeros((len(linhas), 4), dtype="float32"))
+
+    assert tabela.buscar_chave("estágio sem remuneração, posso fazer?", "informatica") == 1
+    assert tabela.buscar_chave("estágio com remuneração, posso fazer?", "informatica") == 0
+    assert tabela.buscar_chave("relatório de estágio, onde entrego?", "") == 3
+    assert tabela.buscar_chave("relatório de estágio, quando entrego?", "") == 2
+    assert tabela.buscar_chave("Como entrego o relatório de estágio?", "") is None